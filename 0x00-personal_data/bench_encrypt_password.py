@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark of batch bcrypt hashing: hashes/sec and hashes/sec per core
+for an increasing number of worker processes.
+
+Usage: ./bench_encrypt_password.py [count] [rounds]
+"""
+
+import os
+import sys
+import time
+
+hash_passwords = __import__('encrypt_password').hash_passwords
+are_valid = __import__('encrypt_password').are_valid
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    passwords = ["password-{}".format(i) for i in range(count)]
+    cpus = os.cpu_count() or 1
+
+    workers = 1
+    while True:
+        start = time.perf_counter()
+        hashed = hash_passwords(passwords, rounds, workers=workers)
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed
+        print("hash   workers={:<3} {:>9,.1f} hashes/sec {:>8,.1f} per core"
+              .format(workers, rate, rate / workers))
+
+        start = time.perf_counter()
+        assert all(are_valid(zip(hashed, passwords), workers=workers))
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed
+        print("verify workers={:<3} {:>9,.1f} checks/sec {:>8,.1f} per core"
+              .format(workers, rate, rate / workers))
+
+        if workers >= cpus:
+            break
+        workers = min(workers * 2, cpus)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark of filter_datum: lines/sec before and after the single-pass
+compiled redaction engine.
+"""
+
+import re
+import sys
+import time
+from typing import Callable, List
+
+filter_datum = __import__('filtered_logger').filter_datum
+PII_FIELDS = __import__('filtered_logger').PII_FIELDS
+
+
+def legacy_filter_datum(
+    fields: List[str], redaction: str, message: str, separator: str
+) -> str:
+    """
+    Previous implementation: one regex compilation and one full scan of
+    the message per field.
+    """
+    for field in fields:
+        message = re.sub(
+            rf'({field})=[^{separator}]+', f'\\1={redaction}', message
+        )
+    return message
+
+
+def lines_per_second(func: Callable, lines: List[str]) -> float:
+    """
+    Redact every line with func and return the achieved throughput.
+    """
+    start = time.perf_counter()
+    for line in lines:
+        func(PII_FIELDS, '***', line, ';')
+    return len(lines) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    lines = [
+        "name=user{0};email=user{0}@example.com;phone=(555) 010-{0:04d};"
+        "ssn=123-45-{0:04d};password=secret{0};ip=10.0.0.1;"
+        "last_login=2019-11-14 06:16:24;user_agent=Mozilla/5.0;"
+        .format(i % 10000)
+        for i in range(count)
+    ]
+    for line in lines[:100]:
+        assert legacy_filter_datum(PII_FIELDS, '***', line, ';') == \
+            filter_datum(PII_FIELDS, '***', line, ';')
+
+    before = lines_per_second(legacy_filter_datum, lines)
+    after = lines_per_second(filter_datum, lines)
+    print("before: {:,.0f} lines/sec".format(before))
+    print("after:  {:,.0f} lines/sec".format(after))
+    print("speedup: {:.2f}x".format(after / before))
@@ -3,20 +3,122 @@
 Module to securely hash and validate passwords using bcrypt.
 """
 
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterable, List, Tuple
+
 import bcrypt
 
+# bcrypt cost factor (log2 of the number of rounds), bcrypt's own default
+DEFAULT_ROUNDS = 12
+MAX_ROUNDS = 31
+# File holding the cost factor picked by calibrate_rounds()
+ROUNDS_FILE = os.getenv("BCRYPT_ROUNDS_FILE", ".bcrypt_rounds")
+
+_rounds = None
+
+
+def current_rounds() -> int:
+    """
+    Get the cost factor used for new hashes.
+
+    Returns:
+        int: The calibrated cost factor stored in ROUNDS_FILE, or
+        DEFAULT_ROUNDS if none was stored.
+    """
+    global _rounds
+    if _rounds is None:
+        try:
+            with open(ROUNDS_FILE, 'r') as f:
+                _rounds = int(f.read().strip())
+        except (OSError, ValueError):
+            _rounds = DEFAULT_ROUNDS
+    return _rounds
+
+
+def calibrate_rounds(target_ms: float = 50.0, min_rounds: int = 10,
+                     save: bool = True) -> int:
+    """
+    Find the highest cost factor whose verification meets a latency target
+    on the current machine.
+
+    Args:
+        target_ms (float): Target verification time in milliseconds.
+        min_rounds (int): Lowest cost factor ever returned, even if the
+            machine is too slow to meet the target with it.
+        save (bool): Store the result in ROUNDS_FILE and use it for new
+            hashes.
+
+    Returns:
+        int: The calibrated cost factor.
+    """
+    global _rounds
+    password = b"calibration-password"
+    rounds = min_rounds
+    while rounds < MAX_ROUNDS:
+        hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds + 1))
+        elapsed = None
+        for _ in range(3):
+            start = time.perf_counter()
+            bcrypt.checkpw(password, hashed)
+            sample = (time.perf_counter() - start) * 1000
+            elapsed = sample if elapsed is None else min(elapsed, sample)
+        if elapsed > target_ms:
+            break
+        rounds += 1
+
+    if save:
+        with open(ROUNDS_FILE, 'w') as f:
+            f.write("{}\n".format(rounds))
+        _rounds = rounds
+    return rounds
 
-def hash_password(password: str) -> bytes:
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """
+    Get the cost factor a bcrypt hash was created with.
+
+    Args:
+        hashed_password (bytes): A hash in the $2b$<cost>$... format.
+
+    Returns:
+        int: The cost factor of the hash.
+    """
+    return int(hashed_password.split(b'$')[2])
+
+
+def needs_rehash(hashed_password: bytes) -> bool:
+    """
+    Tell whether a hash uses a cost factor other than the current one.
+
+    Args:
+        hashed_password (bytes): The salted and hashed password.
+
+    Returns:
+        bool: True if the password should be hashed again.
+    """
+    try:
+        return hash_rounds(hashed_password) != current_rounds()
+    except (IndexError, ValueError):
+        return True
+
+
+def hash_password(password: str, rounds: int = None) -> bytes:
     """
     Hashes and salts a password using bcrypt.
 
     Args:
         password (str): The password to be hashed.
+        rounds (int): The bcrypt cost factor, current_rounds() by default.
 
     Returns:
         bytes: The salted and hashed password.
     """
-    salt = bcrypt.gensalt()
+    if rounds is None:
+        rounds = current_rounds()
+    salt = bcrypt.gensalt(rounds)
     hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed_password
 
@@ -36,5 +138,83 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
 
 
+def is_valid_with_rehash(
+    hashed_password: bytes, password: str
+) -> Tuple[bool, bool]:
+    """
+    Validates a password and reports whether its hash is outdated.
+
+    On a successful login with an outdated hash, the caller should store
+    hash_password(password) in place of the old hash.
+
+    Args:
+        hashed_password (bytes): The salted and hashed password.
+        password (str): The password to be validated.
+
+    Returns:
+        Tuple[bool, bool]: Whether the password is valid, and whether it
+        is valid but hashed with an outdated cost factor.
+    """
+    if not is_valid(hashed_password, password):
+        return False, False
+    return True, needs_rehash(hashed_password)
+
+
+def _is_valid_pair(pair: Tuple[bytes, str]) -> bool:
+    """
+    Validates a (hashed_password, password) pair, for use with map().
+    """
+    return is_valid(*pair)
+
+
+def hash_passwords(passwords: Iterable[str], rounds: int = None,
+                   workers: int = None, chunksize: int = 16) -> List[bytes]:
+    """
+    Hashes many passwords across a pool of worker processes.
+
+    Args:
+        passwords (Iterable[str]): The passwords to be hashed.
+        rounds (int): The bcrypt cost factor, current_rounds() by default.
+        workers (int): Number of worker processes, one per CPU by default.
+            With 1, passwords are hashed on the calling thread.
+        chunksize (int): Number of passwords sent to a worker at once.
+
+    Returns:
+        List[bytes]: The hashed passwords, in input order.
+    """
+    if rounds is None:
+        rounds = current_rounds()
+    if workers == 1:
+        return [hash_password(password, rounds) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hash_password, passwords, repeat(rounds),
+                                 chunksize=chunksize))
+
+
+def are_valid(pairs: Iterable[Tuple[bytes, str]], workers: int = None,
+              chunksize: int = 16) -> List[bool]:
+    """
+    Validates many passwords against their hashes across worker processes.
+
+    Args:
+        pairs (Iterable[Tuple[bytes, str]]): (hashed_password, password)
+            pairs to be validated.
+        workers (int): Number of worker processes, one per CPU by default.
+            With 1, pairs are validated on the calling thread.
+        chunksize (int): Number of pairs sent to a worker at once.
+
+    Returns:
+        List[bool]: Whether each password matches its hash, in input order.
+    """
+    if workers == 1:
+        return [_is_valid_pair(pair) for pair in pairs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_is_valid_pair, pairs, chunksize=chunksize))
+
+
 if __name__ == "__main__":
-    pass
+    import sys
+
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+    print("bcrypt cost factor for {} ms: {}".format(
+        target, calibrate_rounds(target)))
@@ -4,8 +4,33 @@ Module for obfuscating sensitive data in log messages using regex.
 """
 
 import re
+import sys
+import queue
 import logging
-from typing import List
+import threading
+from functools import lru_cache
+from typing import List, Pattern, Sequence
+
+# Number of distinct (fields, separator) patterns kept compiled at once
+PATTERN_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _redaction_pattern(fields: Sequence[str], separator: str) -> Pattern:
+    """
+    Compile a single alternation pattern matching any of the given fields.
+
+    Args:
+        fields (Sequence[str]): Hashable sequence of fields to obfuscate.
+        separator (str): Character separating fields in the log message.
+
+    Returns:
+        Pattern: Compiled pattern capturing the field name in group 1.
+    """
+    alternation = "|".join(re.escape(field) for field in fields)
+    return re.compile(
+        r'({})=[^{}]+'.format(alternation, re.escape(separator))
+    )
 
 
 def filter_datum(
@@ -14,6 +39,9 @@ def filter_datum(
     """
     Obfuscate sensitive fields in the log message using regex substitution.
 
+    All fields are redacted in a single scan of the message with a pattern
+    compiled once per (fields, separator) pair.
+
     Args:
         fields (List[str]): List of fields to obfuscate.
         redaction (str): String to replace the obfuscated fields.
@@ -23,11 +51,12 @@ def filter_datum(
     Returns:
         str: The obfuscated log message.
     """
-    for field in fields:
-        message = re.sub(
-            rf'({field})=[^{separator}]+', f'\\1={redaction}', message
-        )
-    return message
+    if not fields:
+        return message
+    pattern = _redaction_pattern(tuple(fields), separator)
+    return pattern.sub(
+        '\\1=' + redaction.replace('\\', '\\\\'), message
+    )
 
 
 class RedactingFormatter(logging.Formatter):
@@ -71,18 +100,175 @@ class RedactingFormatter(logging.Formatter):
         )
 
 
-def get_logger():
+class AsyncRedactingHandler(logging.Handler):
+    """
+    Queue-backed handler that moves redaction and writes off the caller.
+
+    Records are enqueued on the logging thread; a background worker drains
+    the queue in batches, formats each record with a RedactingFormatter
+    and writes the whole batch to the stream at once.
+
+    Args:
+        fields (List[str]): List of fields to obfuscate.
+        stream: Stream to write to, sys.stderr by default.
+        maxsize (int): Maximum number of queued records.
+        policy (str): What to do when the queue is full, either "drop"
+            (discard the record and count it) or "block" (wait for room).
+            Records emitted after close() are discarded and counted too.
+        batch_size (int): Maximum number of records written per batch.
+    """
+
+    POLICIES = ("drop", "block")
+    _STOP = object()
+
+    def __init__(self, fields: List[str], stream=None, maxsize: int = 10000,
+                 policy: str = "drop", batch_size: int = 256):
+        super().__init__()
+        if policy not in self.POLICIES:
+            raise ValueError("Invalid queue policy: {}".format(policy))
+        self.stream = stream if stream is not None else sys.stderr
+        self.policy = policy
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self.written = 0
+        self._closed = False
+        self._dropped_lock = threading.Lock()
+        self.setFormatter(RedactingFormatter(fields=fields))
+        self._worker = threading.Thread(
+            target=self._run, name="redacting-log-writer", daemon=True
+        )
+        self._worker.start()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """
+        Enqueue the record, applying the queue policy when it is full.
+
+        Args:
+            record (logging.LogRecord): The log record to be written.
+        """
+        if self._closed or not self._worker.is_alive():
+            self._count_dropped()
+            return
+        try:
+            record.msg = record.getMessage()
+            record.args = None
+            if self.policy == "block":
+                self.queue.put(record)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self._count_dropped()
+        except Exception:
+            self.handleError(record)
+
+    def _count_dropped(self, count: int = 1) -> None:
+        """
+        Count records discarded instead of written.
+
+        Args:
+            count (int): Number of records discarded.
+        """
+        with self._dropped_lock:
+            self.dropped += count
+
+    def _run(self) -> None:
+        """
+        Worker loop: drain up to batch_size records, redact and write them.
+        """
+        stop = False
+        while not stop:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            last = None
+            for record in batch:
+                if record is self._STOP:
+                    stop = True
+                    continue
+                last = record
+                try:
+                    lines.append(self.format(record) + "\n")
+                except Exception:
+                    self.handleError(record)
+            try:
+                if lines:
+                    self.stream.write("".join(lines))
+                    self.stream.flush()
+                    self.written += len(lines)
+            except Exception:
+                self.handleError(last)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def flush(self) -> None:
+        """
+        Block until every record queued so far has been written.
+        """
+        if self._worker.is_alive():
+            self.queue.join()
+
+    def close(self) -> None:
+        """
+        Flush pending records and stop the worker. Records enqueued
+        while it stopped are counted as dropped.
+        """
+        self._closed = True
+        if self._worker.is_alive():
+            self.queue.put(self._STOP)
+            self._worker.join()
+        left = 0
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.queue.task_done()
+            left += 1
+        self._count_dropped(left)
+        super().close()
+
+    def metrics(self) -> dict:
+        """
+        Get the queue metrics of the handler.
+
+        Returns:
+            dict: Current queue depth, dropped and written record counts.
+        """
+        return {
+            "queue_depth": self.queue.qsize(),
+            "dropped": self.dropped,
+            "written": self.written,
+        }
+
+
+def get_logger(asynchronous: bool = False, **kwargs) -> logging.Logger:
     """
     Get a logger named "user_data" that logs up to logging.INFO level.
-    The logger has a StreamHandler with RedactingFormatter as formatter.
+    The logger has a StreamHandler with RedactingFormatter as formatter,
+    or an AsyncRedactingHandler when asynchronous is True.
+
+    Args:
+        asynchronous (bool): Install the queue-backed handler.
+        **kwargs: Options passed to AsyncRedactingHandler (maxsize,
+            policy, batch_size, stream).
+
     Returns:
         logging.Logger: A logger instance.
     """
     logger = logging.getLogger("user_data")
     logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    formatter = RedactingFormatter(fields=PII_FIELDS)
-    handler.setFormatter(formatter)
+    if asynchronous:
+        handler = AsyncRedactingHandler(fields=PII_FIELDS, **kwargs)
+    else:
+        handler = logging.StreamHandler()
+        formatter = RedactingFormatter(fields=PII_FIELDS)
+        handler.setFormatter(formatter)
     logger.addHandler(handler)
     return logger
 
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Module to redact PII from large CSV or key=value; exports in a stream.
+
+Usage:
+    ./redact_export.py user_data.csv redacted.csv
+    ./redact_export.py app.log redacted.log --format kv --workers 4
+"""
+
+import argparse
+import csv
+import io
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence, TextIO
+
+from filtered_logger import PII_FIELDS, filter_datum
+
+REDACTION = "***"
+CHUNK_ROWS = 10000
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    """
+    Split an iterable into lists of at most size items.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def redact_csv_chunk(rows: List[List[str]], indexes: Sequence[int],
+                     redaction: str) -> str:
+    """
+    Redact the given column indexes of CSV rows and serialize them.
+
+    Args:
+        rows (List[List[str]]): Parsed CSV rows.
+        indexes (Sequence[int]): Indexes of the columns to obfuscate.
+        redaction (str): String to replace the obfuscated values.
+
+    Returns:
+        str: The redacted rows as CSV text.
+    """
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for row in rows:
+        for index in indexes:
+            if index < len(row):
+                row[index] = redaction
+        writer.writerow(row)
+    return out.getvalue()
+
+
+def redact_kv_chunk(lines: List[str], fields: Sequence[str],
+                    redaction: str, separator: str) -> str:
+    """
+    Redact the given fields of key=value lines.
+
+    Args:
+        lines (List[str]): Lines including their line terminator.
+        fields (Sequence[str]): Fields to obfuscate.
+        redaction (str): String to replace the obfuscated values.
+        separator (str): Character separating fields in a line.
+
+    Returns:
+        str: The redacted lines.
+    """
+    return "".join(
+        filter_datum(fields, redaction, line, separator) for line in lines
+    )
+
+
+def _stream(func, chunks: Iterable[list], args: tuple, dst: TextIO,
+            workers: int) -> int:
+    """
+    Apply func to every chunk and write the results to dst in order.
+
+    With more than one worker, chunks are processed in a process pool with
+    at most two chunks per worker in flight, so memory stays bounded.
+
+    Returns:
+        int: The number of rows processed.
+    """
+    count = 0
+    if workers <= 1:
+        for chunk in chunks:
+            dst.write(func(chunk, *args))
+            count += len(chunk)
+        return count
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks:
+            if len(pending) >= workers * 2:
+                dst.write(pending.popleft().result())
+            pending.append(executor.submit(func, chunk, *args))
+            count += len(chunk)
+        while pending:
+            dst.write(pending.popleft().result())
+    return count
+
+
+def redact_csv(src: TextIO, dst: TextIO, fields: Sequence[str] = PII_FIELDS,
+               redaction: str = REDACTION, chunk_rows: int = CHUNK_ROWS,
+               workers: int = 1) -> int:
+    """
+    Redact the PII columns of a CSV stream, selected by header name.
+
+    Args:
+        src (TextIO): CSV input opened with newline=''.
+        dst (TextIO): CSV output opened with newline=''.
+        fields (Sequence[str]): Columns to obfuscate.
+        redaction (str): String to replace the obfuscated values.
+        chunk_rows (int): Number of rows processed per chunk.
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: The number of data rows written.
+    """
+    reader = csv.reader(src)
+    header = next(reader, None)
+    if header is None:
+        return 0
+    csv.writer(dst).writerow(header)
+    indexes = tuple(i for i, name in enumerate(header) if name in fields)
+    return _stream(redact_csv_chunk, _chunks(reader, chunk_rows),
+                   (indexes, redaction), dst, workers)
+
+
+def redact_kv(src: TextIO, dst: TextIO, fields: Sequence[str] = PII_FIELDS,
+              redaction: str = REDACTION, separator: str = ";",
+              chunk_rows: int = CHUNK_ROWS, workers: int = 1) -> int:
+    """
+    Redact the PII fields of a stream of key=value lines.
+
+    Args:
+        src (TextIO): Input lines.
+        dst (TextIO): Output stream.
+        fields (Sequence[str]): Fields to obfuscate.
+        redaction (str): String to replace the obfuscated values.
+        separator (str): Character separating fields in a line.
+        chunk_rows (int): Number of lines processed per chunk.
+        workers (int): Number of worker processes.
+
+    Returns:
+        int: The number of lines written.
+    """
+    return _stream(redact_kv_chunk, _chunks(src, chunk_rows),
+                   (tuple(fields), redaction, separator), dst, workers)
+
+
+def main(argv: List[str] = None) -> None:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("src", help="input file, '-' for stdin")
+    parser.add_argument("dst", help="output file, '-' for stdout")
+    parser.add_argument("--format", choices=("csv", "kv"), default="csv")
+    parser.add_argument("--fields", default=",".join(PII_FIELDS),
+                        help="comma separated fields to redact")
+    parser.add_argument("--redaction", default=REDACTION)
+    parser.add_argument("--separator", default=";")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    fields = tuple(f for f in args.fields.split(",") if f)
+    src = sys.stdin if args.src == "-" else open(args.src, newline="")
+    dst = sys.stdout if args.dst == "-" else open(args.dst, "w", newline="")
+    start = time.perf_counter()
+    try:
+        if args.format == "csv":
+            rows = redact_csv(src, dst, fields, args.redaction,
+                              args.chunk_rows, args.workers)
+        else:
+            rows = redact_kv(src, dst, fields, args.redaction,
+                             args.separator, args.chunk_rows, args.workers)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    elapsed = time.perf_counter() - start
+    print("{} rows in {:.2f}s ({:,.0f} rows/sec)".format(
+        rows, elapsed, rows / elapsed if elapsed else 0), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 """
 from typing import List, TypeVar
 from flask import request
+from api.v1.auth.path_matcher import PathMatcher, compile_paths
 
 
 class Auth:
@@ -14,23 +15,20 @@ class Auth:
 
         Args:
             path (str): The path to be checked.
-            excluded_paths (list of str): List of paths to be excluded.
+            excluded_paths (list of str or PathMatcher): List of paths to
+            be excluded, or their compiled matcher.
 
         Returns:
             bool: True if authentication is required, False otherwise.
         """
-        if path is None or excluded_paths is None or \
-           not isinstance(excluded_paths, list):
+        if path is None or excluded_paths is None:
+            return True
+        if isinstance(excluded_paths, list):
+            excluded_paths = compile_paths(tuple(excluded_paths))
+        elif not isinstance(excluded_paths, PathMatcher):
             return True
 
-        for excluded_path in excluded_paths:
-            if excluded_path.endswith('*') and \
-               path.startswith(excluded_path[:-1]):
-                return False
-            elif path == excluded_path:
-                return False
-
-        return True
+        return not excluded_paths.matches(path)
 
     def authorization_header(self, request=None) -> str:
         """
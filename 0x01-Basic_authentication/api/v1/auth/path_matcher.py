@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Path matcher module
+
+This module defines the matcher of the paths excluded from
+authentication: a path is excluded if it equals one of the paths, or
+starts with the part before the "*" of one of the paths ending with "*".
+"""
+
+from functools import lru_cache
+from typing import Iterable, Tuple
+
+# Number of excluded path lists kept compiled by compile_paths
+PATH_MATCHER_CACHE_SIZE = 32
+# Key of the trie nodes ending a wildcard prefix
+_END = ""
+
+
+class PathMatcher:
+    """
+    Matcher of excluded paths
+
+    Exact paths are kept in a set and wildcard prefixes in a trie of
+    characters, so a lookup costs O(length of the path) whatever the
+    number of excluded paths.
+    """
+
+    def __init__(self, paths: Iterable[str] = ()):
+        """
+        Initialize the matcher.
+
+        Args:
+            paths (iterable of str): The excluded paths.
+        """
+        self.exact = set()
+        self.prefixes = {}
+        for path in paths:
+            self.add(path)
+
+    def add(self, path: str):
+        """
+        Add an excluded path.
+
+        Args:
+            path (str): The path, or a prefix followed by "*".
+        """
+        if not path.endswith('*'):
+            self.exact.add(path)
+            return
+        node = self.prefixes
+        for char in path[:-1]:
+            node = node.setdefault(char, {})
+        node[_END] = True
+
+    def matches(self, path: str) -> bool:
+        """
+        Tell whether a path is excluded.
+
+        Args:
+            path (str): The path to be checked.
+
+        Returns:
+            bool: True if the path is excluded, False otherwise.
+        """
+        if path in self.exact:
+            return True
+        node = self.prefixes
+        if _END in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+        return False
+
+
+@lru_cache(maxsize=PATH_MATCHER_CACHE_SIZE)
+def compile_paths(paths: Tuple[str, ...]) -> PathMatcher:
+    """
+    Get the matcher of a list of excluded paths, built once per list.
+
+    Args:
+        paths (tuple of str): The excluded paths.
+
+    Returns:
+        PathMatcher: The matcher.
+    """
+    return PathMatcher(paths)
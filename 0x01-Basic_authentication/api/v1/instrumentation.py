@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Instrumentation module
+
+This module records how long each authentication stage and storage call
+takes, per endpoint, in histograms rendered in the Prometheus text
+format. It is enabled by setting AUTH_METRICS; otherwise nothing is
+wrapped nor timed and requests pay no cost.
+
+The authentication stages are timed where before_request calls them,
+rather than by wrapping the auth methods, since those methods also call
+each other and a wrapped call would be counted again inside its caller.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+
+from flask import has_request_context, request
+
+ENABLED = os.environ.get("AUTH_METRICS", "").lower() in ("1", "true", "yes")
+# Upper bounds of the histogram buckets, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRIC_NAME = "auth_stage_duration_seconds"
+
+
+class Histograms:
+    """
+    Duration histograms keyed by (stage, endpoint)
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        Initialize empty histograms.
+
+        Args:
+            buckets (tuple of float): Upper bounds of the buckets.
+        """
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, endpoint: str, seconds: float):
+        """
+        Record a duration.
+
+        Args:
+            stage (str): The stage measured.
+            endpoint (str): The endpoint of the request.
+            seconds (float): The duration.
+        """
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get((stage, endpoint))
+            if series is None:
+                series = self._series[(stage, endpoint)] = \
+                    [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self) -> str:
+        """
+        Render the histograms in the Prometheus text format.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = [
+            "# HELP {} Time spent in authentication stages and storage "
+            "calls.".format(METRIC_NAME),
+            "# TYPE {} histogram".format(METRIC_NAME)
+        ]
+        with self._lock:
+            series = sorted((key, [list(counts), total, count])
+                            for key, (counts, total, count)
+                            in self._series.items())
+        bounds = ["{:g}".format(b) for b in self.buckets] + ["+Inf"]
+        for (stage, endpoint), (counts, total, count) in series:
+            labels = 'stage="{}",endpoint="{}"'.format(
+                _escape(stage), _escape(endpoint))
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(
+                    METRIC_NAME, labels, bound, cumulative))
+            lines.append("{}_sum{{{}}} {}".format(METRIC_NAME, labels, total))
+            lines.append("{}_count{{{}}} {}".format(
+                METRIC_NAME, labels, count))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """
+    Escape a Prometheus label value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"') \
+        .replace("\n", "\\n")
+
+
+histograms = Histograms()
+
+
+def _observe(stage: str, seconds: float):
+    """
+    Record a duration under stage, for the endpoint of the current request.
+    """
+    endpoint = ""
+    if has_request_context():
+        endpoint = request.endpoint or ""
+    histograms.observe(stage, endpoint, seconds)
+
+
+class _Timer:
+    """
+    Context manager recording the time spent in its block
+    """
+
+    def __init__(self, stage: str):
+        """
+        Initialize the timer.
+
+        Args:
+            stage (str): The stage name.
+        """
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        """
+        Start timing.
+        """
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Record the time spent, whether the block raised or not.
+        """
+        _observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+_NOT_TIMED = nullcontext()
+
+
+def stage(name: str):
+    """
+    Time a block as a stage, for the endpoint of the current request.
+
+    Args:
+        name (str): The stage name.
+
+    Returns:
+        A context manager, which does nothing unless ENABLED.
+    """
+    if not ENABLED:
+        return _NOT_TIMED
+    return _Timer(name)
+
+
+def timed(stage: str, func):
+    """
+    Wrap a function so that each call is recorded under stage, for the
+    endpoint of the current request.
+
+    Args:
+        stage (str): The stage name.
+        func (callable): The function to wrap.
+
+    Returns:
+        callable: The wrapper.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _observe(stage, time.perf_counter() - start)
+    return wrapper
+
+
+def instrument_model(cls, names):
+    """
+    Record the calls of class methods of a model, as "<Class>.<method>"
+    stages.
+
+    Args:
+        cls (type): The model class.
+        names (iterable of str): The class method names.
+    """
+    for name in names:
+        stage = "{}.{}".format(cls.__name__, name)
+        setattr(cls, name, staticmethod(timed(stage, getattr(cls, name))))
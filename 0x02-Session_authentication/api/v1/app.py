@@ -4,12 +4,14 @@ Route module for the API
 """
 
 from os import getenv
+from api.v1 import instrumentation
 from api.v1.views import app_views
 from flask import Flask, jsonify, abort, request
 from werkzeug.exceptions import HTTPException, Forbidden
 from flask_cors import (CORS, cross_origin)
 from api.v1.auth.auth import Auth
 from api.v1.auth.basic_auth import BasicAuth
+from api.v1.auth.path_matcher import PathMatcher
 from api.v1.auth.session_auth import SessionAuth
 from api.v1.auth.session_exp_auth import SessionExpAuth
 from api.v1.auth.session_db_auth import SessionDBAuth
@@ -35,27 +37,45 @@ if 'AUTH_TYPE' in os.environ:
     else:
         auth = Auth()
 
+# Paths served without authentication; AUTH_EXCLUDED_PATHS adds a comma
+# separated list of paths, a trailing "*" excluding every path it prefixes
+EXCLUDED_PATHS = [
+    '/api/v1/status',
+    '/api/v1/unauthorized',
+    '/api/v1/forbidden'
+] + [path.strip() for path in os.environ.get(
+    "AUTH_EXCLUDED_PATHS", "").split(",") if path.strip()]
+excluded_paths = PathMatcher(EXCLUDED_PATHS)
+
+# Opt-in timing of the storage calls, served by /api/v1/metrics with
+# the authentication stages timed in before_request
+if instrumentation.ENABLED:
+    from models.user import User
+    from models.user_session import UserSession
+    instrumentation.instrument_model(
+        User, ("get", "search", "count", "all"))
+    instrumentation.instrument_model(UserSession, ("search",))
+
 
 @app.before_request
 def before_request():
     """
     Before request handler to perform authentication and authorization checks.
     """
-    if auth:
-        excluded_paths = [
-            '/api/v1/status',
-            '/api/v1/unauthorized',
-            '/api/v1/forbidden'
-        ]
-        if request.path not in excluded_paths and auth.require_auth(
-            request.path, excluded_paths
-        ):
-            auth_header = auth.authorization_header(request)
-            if auth_header is None:
-                abort(401)
-            current_user = auth.current_user(request)
-            if current_user is None:
-                abort(403)
+    if auth is None:
+        return
+    with instrumentation.stage("require_auth"):
+        required = auth.require_auth(request.path, excluded_paths)
+    if not required:
+        return
+    with instrumentation.stage("authorization_header"):
+        auth_header = auth.authorization_header(request)
+    if auth_header is None:
+        abort(401)
+    with instrumentation.stage("current_user"):
+        request.current_user = auth.resolve_user(request)
+    if request.current_user is None:
+        abort(403)
 
 
 @app.route('/api/v1/status', methods=['GET'], strict_slashes=False)
@@ -91,6 +111,10 @@ def forbidden(error):
 
 
 if __name__ == "__main__":
+    from models.engine.storage import LOAD_STATS
+    for s_class, stats in LOAD_STATS.items():
+        print("Loaded {} {} objects in {:.3f}s".format(
+            stats["count"], s_class, stats["seconds"]))
     host = getenv("API_HOST", "0.0.0.0")
     port = getenv("API_PORT", "5000")
     app.run(host=host, port=port)
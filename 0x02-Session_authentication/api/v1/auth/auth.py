@@ -4,6 +4,8 @@
 import os
 from typing import List, TypeVar
 from flask import request
+from api.v1.auth.path_matcher import PathMatcher, compile_paths
+from api.v1.auth.user_cache import user_cache
 
 
 class Auth:
@@ -15,23 +17,20 @@ class Auth:
 
         Args:
             path (str): The path to be checked.
-            excluded_paths (list of str): List of paths to be excluded.
+            excluded_paths (list of str or PathMatcher): List of paths to
+            be excluded, or their compiled matcher.
 
         Returns:
             bool: True if authentication is required, False otherwise.
         """
-        if path is None or excluded_paths is None or \
-           not isinstance(excluded_paths, list):
+        if path is None or excluded_paths is None:
+            return True
+        if isinstance(excluded_paths, list):
+            excluded_paths = compile_paths(tuple(excluded_paths))
+        elif not isinstance(excluded_paths, PathMatcher):
             return True
 
-        for excluded_path in excluded_paths:
-            if excluded_path.endswith('*') and \
-               path.startswith(excluded_path[:-1]):
-                return False
-            elif path == excluded_path:
-                return False
-
-        return True
+        return not excluded_paths.matches(path)
 
     def authorization_header(self, request=None) -> str:
         """
@@ -51,6 +50,83 @@ class Auth:
         """
         return None
 
+    def credential_token(self, request=None) -> str:
+        """
+        Get the credential identifying the user of a request, used as
+        the key of the user cache.
+
+        Returns:
+            str: None, as Auth has no credential.
+        """
+        return None
+
+    def cache_ttl(self, token: str) -> float:
+        """
+        Lifetime of the cached user of a credential.
+
+        Args:
+            token (str): The credential.
+
+        Returns:
+            float: A number of seconds, or None for the cache lifetime.
+        """
+        return None
+
+    def cached_user_valid(self, token: str, user: TypeVar('User')) -> bool:
+        """
+        Tell whether a user found in the user cache still holds the
+        credential, for the changes made by other processes.
+
+        Args:
+            token (str): The credential.
+            user (User): The cached user.
+
+        Returns:
+            bool: True, as Auth has no credential to check.
+        """
+        return True
+
+    def resolve_user(self, request=None) -> TypeVar('User'):
+        """
+        Get the current user from the request, through the user cache.
+        A cached user is checked with cached_user_valid() before use.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            User instance or None.
+        """
+        token = self.credential_token(request)
+        if token is None:
+            return self.current_user(request)
+
+        key = self._user_cache_key(token)
+        user = user_cache.get(key)
+        if user is not None and not self.cached_user_valid(token, user):
+            user_cache.invalidate(key)
+            user = None
+        if user is None:
+            user = self.current_user(request)
+            if user is not None:
+                user_cache.set(key, user, self.cache_ttl(token))
+        return user
+
+    def uncache_user(self, token: str):
+        """
+        Drop the cached user of a credential.
+
+        Args:
+            token (str): The credential.
+        """
+        user_cache.invalidate(self._user_cache_key(token))
+
+    def _user_cache_key(self, token: str) -> tuple:
+        """
+        Key of a credential in the user cache, distinct per auth class.
+        """
+        return (self.__class__.__name__, token)
+
     def session_cookie(self, request=None) -> str:
         """
         Returns a cookie value from a request.
@@ -3,6 +3,12 @@
 """
 
 import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
 from api.v1.auth.auth import Auth
 from typing import TypeVar
 from models.user import User
@@ -10,8 +16,38 @@ from models.user import User
 
 class BasicAuth(Auth):
     """ BasicAuth class for managing basic authentication
+
+    Verified credentials are cached: an Authorization header already
+    checked maps to its user ID and password hash, so the next requests
+    sending it are not decoded nor hashed again. Headers are keyed by
+    their HMAC with a per-process random key, so the credentials are not
+    kept in memory. An entry is dropped after BASIC_AUTH_CACHE_TTL
+    seconds (300 by default), when the user password changes, or when
+    BASIC_AUTH_CACHE_SIZE (10000 by default) newer entries are cached.
+
+    Requests skip the user cache shared by the auth classes, whose hits
+    are not checked against the password hash, so that a password changed
+    by another process sharing the storage is seen on the next request.
     """
 
+    def __init__(self):
+        """ Initialize BasicAuth with an empty verified-credential cache
+        """
+        super().__init__()
+        self._hmac_key = os.urandom(32)
+        self._verified = OrderedDict()
+        self._verified_lock = threading.Lock()
+        try:
+            self.verified_cache_size = int(
+                os.environ.get("BASIC_AUTH_CACHE_SIZE", 10000))
+        except ValueError:
+            self.verified_cache_size = 10000
+        try:
+            self.verified_cache_ttl = float(
+                os.environ.get("BASIC_AUTH_CACHE_TTL", 300))
+        except ValueError:
+            self.verified_cache_ttl = 300.0
+
     def extract_base64_authorization_header(
         self, authorization_header: str
     ) -> str:
@@ -86,7 +122,6 @@ class BasicAuth(Auth):
             return None, None
 
         user_credentials = decoded_base64_authorization_header.rsplit(':', 1)
-        print(f"User credentials: {user_credentials}")
         if len(user_credentials) != 2:
             return None, None
 
@@ -122,3 +157,104 @@ class BasicAuth(Auth):
             return None
 
         return user
+
+    def credential_token(self, request=None) -> str:
+        """
+        Get the keyed hash of the Authorization header of the request.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            str: The HMAC-SHA256 of the Authorization header, or None.
+        """
+        header = self.authorization_header(request)
+        if header is None:
+            return None
+        return hmac.new(self._hmac_key, header.encode(),
+                        hashlib.sha256).hexdigest()
+
+    def resolve_user(self, request=None) -> TypeVar('User'):
+        """
+        Get the current user from the request, through the verified
+        credential cache only.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            User instance or None.
+        """
+        return self.current_user(request)
+
+    def _verified_user(self, token: str) -> TypeVar('User'):
+        """
+        Get the user of verified credentials, if still valid.
+
+        Args:
+            token (str): The keyed hash of the Authorization header.
+
+        Returns:
+            User: The User instance, or None if not cached, expired, or
+            if the user or its password changed.
+        """
+        with self._verified_lock:
+            entry = self._verified.get(token)
+            if entry is None:
+                return None
+            expires_at, user_id, password = entry
+            if expires_at <= time.monotonic():
+                del self._verified[token]
+                return None
+            self._verified.move_to_end(token)
+        user = User.get(user_id)
+        if user is None or user.password != password:
+            with self._verified_lock:
+                self._verified.pop(token, None)
+            return None
+        return user
+
+    def _cache_verified(self, token: str, user: TypeVar('User')):
+        """
+        Cache verified credentials.
+
+        Args:
+            token (str): The keyed hash of the Authorization header.
+            user (User): The user they belong to.
+        """
+        if self.verified_cache_size <= 0 or self.verified_cache_ttl <= 0:
+            return
+        with self._verified_lock:
+            self._verified[token] = (
+                time.monotonic() + self.verified_cache_ttl,
+                user.id, user.password)
+            self._verified.move_to_end(token)
+            while len(self._verified) > self.verified_cache_size:
+                self._verified.popitem(last=False)
+
+    def current_user(self, request=None) -> TypeVar('User'):
+        """
+        Get the User instance of the Basic credentials of a request.
+
+        Args:
+            request: The request object.
+
+        Returns:
+            User: The User instance if the credentials are valid,
+            otherwise None.
+        """
+        token = self.credential_token(request)
+        if token is None:
+            return None
+        user = self._verified_user(token)
+        if user is not None:
+            return user
+
+        header = self.authorization_header(request)
+        b64_header = self.extract_base64_authorization_header(header)
+        decoded = self.decode_base64_authorization_header(b64_header)
+        user_email, user_pwd = self.extract_user_credentials(decoded)
+        user = self.user_object_from_credentials(user_email, user_pwd)
+        if user is not None:
+            self._cache_verified(token, user)
+        return user
@@ -6,6 +6,7 @@ SessionAuth module
 import uuid
 
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_store import get_session_store
 from models.user import User
 
 
@@ -16,6 +17,24 @@ class SessionAuth(Auth):
 
     user_id_by_session_id = {}
 
+    def __init__(self):
+        """
+        Initialize SessionAuth with the session store selected by the
+        SESSION_STORE environment variable. The "memory" store keeps the
+        sessions in user_id_by_session_id.
+        """
+        super().__init__()
+        self.session_store = get_session_store(self.user_id_by_session_id)
+
+    def session_created_at(self):
+        """
+        Creation time stored with new sessions.
+
+        Returns:
+            datetime: None, as SessionAuth sessions do not expire.
+        """
+        return None
+
     def create_session(self, user_id: str = None) -> str:
         """
         Creates a Session ID for a user_id.
@@ -30,7 +49,8 @@ class SessionAuth(Auth):
             return None
 
         session_id = str(uuid.uuid4())
-        self.user_id_by_session_id[session_id] = user_id
+        self.session_store.set(session_id, user_id,
+                               self.session_created_at())
         return session_id
 
     def user_id_for_session_id(self, session_id: str = None) -> str:
@@ -46,22 +66,38 @@ class SessionAuth(Auth):
         if session_id is None or not isinstance(session_id, str):
             return None
 
-        return self.user_id_by_session_id.get(session_id)
+        session = self.session_store.get(session_id)
+        if session is None:
+            return None
+        return session["user_id"]
 
-    def user_id_for_session_id(self, session_id: str = None) -> str:
+    def credential_token(self, request=None) -> str:
         """
-        Returns a User ID based on a Session ID.
+        Get the session cookie of the request.
 
         Args:
-            session_id (str): The Session ID.
+            request: The request object.
 
         Returns:
-            str: The User ID associated with the Session ID, or None.
+            str: The Session ID, or None.
         """
-        if session_id is None or not isinstance(session_id, str):
-            return None
+        return self.session_cookie(request)
 
-        return self.user_id_by_session_id.get(session_id)
+    def cached_user_valid(self, token: str, user) -> bool:
+        """
+        Tell whether the session of a cached user still exists, as it may
+        have been destroyed or reaped by another process sharing the
+        session store. This is one lookup of the store, by Session ID.
+
+        Args:
+            token (str): The Session ID.
+            user (User): The cached user.
+
+        Returns:
+            bool: True if the session still belongs to the user.
+        """
+        session = self.session_store.get(token)
+        return session is not None and session["user_id"] == user.id
 
     def current_user(self, request=None):
         """
@@ -109,5 +145,6 @@ class SessionAuth(Auth):
         if user_id is None:
             return False
 
-        self.user_id_by_session_id.pop(session_id, None)
+        self.session_store.delete(session_id)
+        self.uncache_user(session_id)
         return True
@@ -7,9 +7,11 @@ authentication using database storage.
 """
 
 from api.v1.auth.session_exp_auth import SessionExpAuth
-from models.user_session import UserSession
-from datetime import datetime, timedelta
-from flask import request
+from api.v1.auth.session_store import UserSessionStore
+from datetime import timedelta
+import atexit
+import heapq
+import os
 
 
 class SessionDBAuth(SessionExpAuth):
@@ -18,67 +20,56 @@ class SessionDBAuth(SessionExpAuth):
 
     This class extends SessionExpAuth and adds database storage for user
     sessions.
-    """
-    def create_session(self, user_id=None):
-        """
-        Creates a new session in the database.
-
-        Args:
-            user_id (str): The ID of the user.
 
-        Returns:
-            str: The created session ID.
-        """
-        if user_id is None:
-            return None
+    Sessions are UserSession objects found through the session_id index
+    of the storage, so creating, looking up and destroying a session take
+    one indexed lookup each, whatever the number of stored sessions.
 
-        session_id = super().create_session(user_id)
-        if session_id:
-            user_session = UserSession(user_id=user_id, session_id=session_id)
-            user_session.save()
-            return session_id
+    Refreshes of sliding sessions are not saved one by one: they are
+    queued and saved together once SESSION_TOUCH_BATCH (100 by default)
+    are pending, on each reaper run, and at exit.
+    """
 
-    def user_id_for_session_id(self, session_id=None):
+    def __init__(self):
         """
-        Retrieves user_id from UserSession in the database.
-
-        Args:
-            session_id (str): The session ID.
+        Initialize SessionDBAuth instance with a UserSession store, and
+        index the expiration of the saved sessions.
+        """
+        super().__init__()
+        try:
+            touch_batch = int(os.environ.get("SESSION_TOUCH_BATCH", 100))
+        except ValueError:
+            touch_batch = 100
+        self.session_store = UserSessionStore(touch_batch)
+        atexit.register(self.session_store.flush)
+
+        if self.session_duration > 0:
+            duration = timedelta(seconds=self.session_duration)
+            heap = [((session["created_at"] + duration).timestamp(),
+                     session_id)
+                    for session_id, session in self.session_store.all()]
+            heapq.heapify(heap)
+            with self._expiry_lock:
+                self._expiry_heap = heap
+
+    def flush_touches(self):
+        """
+        Save the queued refreshes of sliding sessions.
 
         Returns:
-            str: The ID of the associated user.
+            int: The number of sessions saved.
         """
-        if session_id is None:
-            return None
-
-        user_id = super().user_id_for_session_id(session_id)
-        if user_id:
-            user_session = UserSession.search({"session_id": session_id})
-            if user_session and len(user_session) > 0:
-                return user_session[0].user_id
+        return self.session_store.flush()
 
-    def destroy_session(self, request=None):
+    def reap_expired(self, now=None):
         """
-        Destroys a session from the database.
+        Save the queued refreshes, then delete the expired sessions.
 
         Args:
-            request: The HTTP request.
+            now (datetime): The current time, datetime.utcnow() by default.
 
         Returns:
-            bool: True if session was successfully destroyed, False otherwise.
+            int: The number of sessions deleted.
         """
-        if request is None:
-            return False
-
-        session_id = self.session_cookie(request)
-        if not session_id:
-            return False
-
-        user_id = self.user_id_for_session_id(session_id)
-        if not user_id:
-            return False
-
-        user_session = UserSession.search({"session_id": session_id})
-        if user_session and len(user_session) > 0:
-            user_session[0].remove()
-            return True
+        self.flush_touches()
+        return super().reap_expired(now)
@@ -8,7 +8,14 @@ session-based authentication with session expiration for the API.
 
 from api.v1.auth.session_auth import SessionAuth
 from datetime import datetime, timedelta
+import heapq
+import logging
 import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 
 class SessionExpAuth(SessionAuth):
@@ -18,6 +25,16 @@ class SessionExpAuth(SessionAuth):
     This class inherits from SessionAuth and adds the functionality
     of session expiration
     to the session-based authentication mechanism.
+
+    Sessions created by an instance are kept in a min-heap ordered by
+    expiration time, and a background thread deletes the expired ones
+    every SESSION_REAP_INTERVAL seconds (60 by default). Times are UTC,
+    like the timestamps of the models.
+
+    When SESSION_SLIDING is set, activity extends a session: a lookup
+    restarts its lifetime once more than SESSION_REFRESH_FRACTION (0.5 by
+    default) of it has elapsed, so a busy session is written at most once
+    per fraction of its lifetime instead of on every request.
     """
 
     def __init__(self):
@@ -43,13 +60,46 @@ class SessionExpAuth(SessionAuth):
         except (ValueError, TypeError):
             self.session_duration = 0
 
+        try:
+            self.reap_interval = float(
+                os.environ.get("SESSION_REAP_INTERVAL", 60))
+        except ValueError:
+            self.reap_interval = 60.0
+        self.sliding = os.environ.get("SESSION_SLIDING", "").lower() in \
+            ("1", "true", "yes")
+        try:
+            self.refresh_fraction = min(max(float(
+                os.environ.get("SESSION_REFRESH_FRACTION", 0.5)), 0.0), 1.0)
+        except ValueError:
+            self.refresh_fraction = 0.5
+        self._expiry_heap = []
+        self._expiry_lock = threading.Lock()
+        self._reaped_last = 0
+        self._reaped_total = 0
+        self._reaper = None
+        if self.session_duration > 0 and self.reap_interval > 0:
+            self._reaper = threading.Thread(target=self._reap_forever,
+                                            daemon=True)
+            self._reaper.start()
+
+    def session_created_at(self):
+        """
+        Creation time stored with new sessions.
+
+        This method overloads the parent method so that the session
+        creation time is stored along with the user ID.
+
+        Returns:
+            datetime: The current time.
+        """
+        return datetime.utcnow()
+
     def create_session(self, user_id=None):
         """
         Create a session for the given user.
 
-        This method overloads the parent method and adds the session
-        creation time
-        to the user_id_by_session_id dictionary.
+        This method overloads the parent method and adds the session to
+        the expiry index.
 
         Args:
             user_id (str): The ID of the user for whom the session
@@ -59,19 +109,173 @@ class SessionExpAuth(SessionAuth):
             str: The created session ID.
         """
         session_id = super().create_session(user_id)
-        if session_id:
-            self.user_id_by_session_id[session_id] = {
-                "user_id": user_id,
-                "created_at": datetime.now()
-            }
+        if session_id and self.session_duration > 0:
+            self._schedule_expiry(session_id, datetime.utcnow())
         return session_id
 
+    def _schedule_expiry(self, session_id, start):
+        """
+        Add a session to the expiry index.
+
+        Args:
+            session_id (str): The session ID.
+            start (datetime): Start of the session lifetime.
+        """
+        expires_at = start + timedelta(seconds=self.session_duration)
+        with self._expiry_lock:
+            heapq.heappush(self._expiry_heap,
+                           (expires_at.timestamp(), session_id))
+
+    def _is_expired(self, session_data, now):
+        """
+        Tell whether a session record is expired.
+
+        Args:
+            session_data (dict): The session record.
+            now (datetime): The current time.
+
+        Returns:
+            bool: True if the session is expired.
+        """
+        if self.session_duration <= 0:
+            return False
+        created_at = session_data.get("created_at")
+        if not created_at:
+            return True
+        expiration_time = created_at + timedelta(seconds=self.session_duration)
+        return now > expiration_time
+
+    def _needs_refresh(self, session_data, now):
+        """
+        Tell whether a sliding session is due for a refresh.
+
+        Args:
+            session_data (dict): The session record, not expired.
+            now (datetime): The current time.
+
+        Returns:
+            bool: True if more than refresh_fraction of the session
+            lifetime has elapsed.
+        """
+        if not self.sliding or self.session_duration <= 0:
+            return False
+        elapsed = (now - session_data["created_at"]).total_seconds()
+        return elapsed > self.session_duration * self.refresh_fraction
+
+    def refresh_session(self, session_id, user_id, now):
+        """
+        Restart the lifetime of a sliding session.
+
+        Args:
+            session_id (str): The session ID.
+            user_id (str): The user ID of the session.
+            now (datetime): The new start of the session lifetime.
+        """
+        self.session_store.touch(session_id, user_id, now)
+
+    def cache_ttl(self, token):
+        """
+        Lifetime of the cached user of a session: until the session
+        expires, or is due for a refresh when sliding.
+
+        Args:
+            token (str): The session ID.
+
+        Returns:
+            float: A number of seconds, or None for the cache lifetime.
+        """
+        if self.session_duration <= 0:
+            return None
+        session_data = self.session_store.get(token)
+        if session_data is None or not session_data.get("created_at"):
+            return 0
+        lifetime = self.session_duration
+        if self.sliding:
+            lifetime *= self.refresh_fraction
+        elapsed = datetime.utcnow() - session_data["created_at"]
+        return lifetime - elapsed.total_seconds()
+
+    def reap_expired(self, now=None):
+        """
+        Delete the expired sessions of the expiry index.
+
+        Entries are popped in expiration order, so each session costs
+        O(log n). A session whose record is not expired anymore (it was
+        refreshed) is left in the store and indexed again at its new
+        expiration time.
+
+        Args:
+            now (datetime): The current time, datetime.utcnow() by default.
+
+        Returns:
+            int: The number of sessions deleted.
+        """
+        if now is None:
+            now = datetime.utcnow()
+        deadline = now.timestamp()
+        reaped = 0
+        while True:
+            with self._expiry_lock:
+                if not self._expiry_heap or \
+                        self._expiry_heap[0][0] >= deadline:
+                    break
+                _, session_id = heapq.heappop(self._expiry_heap)
+            session_data = self.session_store.get(session_id)
+            if session_data is None:
+                continue
+            if self._is_expired(session_data, now):
+                self.session_store.delete(session_id)
+                reaped += 1
+            else:
+                self._schedule_expiry(session_id, session_data["created_at"])
+        self._reaped_last = reaped
+        self._reaped_total += reaped
+        return reaped
+
+    def _reap_forever(self):
+        """
+        Background reaper loop; a failed run is logged and the next one
+        is attempted after the interval.
+        """
+        while True:
+            time.sleep(self.reap_interval)
+            try:
+                self.reap_expired()
+            except Exception:
+                logger.exception("Reaping expired sessions failed")
+
+    def metrics(self):
+        """
+        Metrics of the sessions and of the expiry index.
+
+        Returns:
+            dict: Live sessions in the store, sessions reaped in the last
+            interval and in total, size of the expiry index, and an
+            estimate of the memory used by the sessions in this process.
+        """
+        with self._expiry_lock:
+            heap_size = len(self._expiry_heap)
+            heap_bytes = sys.getsizeof(self._expiry_heap)
+            if heap_size:
+                entry = self._expiry_heap[0]
+                heap_bytes += heap_size * (
+                    sys.getsizeof(entry) + sys.getsizeof(entry[0]) +
+                    sys.getsizeof(entry[1]))
+        return {
+            "live_sessions": self.session_store.count(),
+            "reaped_last_interval": self._reaped_last,
+            "reaped_total": self._reaped_total,
+            "expiry_index_size": heap_size,
+            "memory_bytes": heap_bytes + self.session_store.memory_usage()
+        }
+
     def user_id_for_session_id(self, session_id=None):
         """
         Retrieve the user ID associated with a session ID.
 
         This method checks the session duration and expiration time
-        to determine whether the session is valid or expired.
+        to determine whether the session is valid or expired, and
+        refreshes sliding sessions when due.
 
         Args:
             session_id (str): The session ID to look up.
@@ -80,19 +284,16 @@ class SessionExpAuth(SessionAuth):
             str or None: The associated user ID or None if the
             session is invalid.
         """
-        if not session_id or session_id not in self.user_id_by_session_id:
+        if not session_id or not isinstance(session_id, str):
             return None
 
-        session_data = self.user_id_by_session_id[session_id]
-        if self.session_duration <= 0:
-            return session_data["user_id"]
-
-        created_at = session_data.get("created_at")
-        if not created_at:
+        session_data = self.session_store.get(session_id)
+        if session_data is None:
             return None
-
-        expiration_time = created_at + timedelta(seconds=self.session_duration)
-        if datetime.now() > expiration_time:
+        now = datetime.utcnow()
+        if self._is_expired(session_data, now):
             return None
+        if self._needs_refresh(session_data, now):
+            self.refresh_session(session_id, session_data["user_id"], now)
 
         return session_data["user_id"]
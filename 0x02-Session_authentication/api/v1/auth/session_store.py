@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Session store module
+
+This module defines where session-based authentication keeps its sessions:
+in the memory of the process, in a SQLite database shared by every
+worker process of the host, or as UserSession objects of the models.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+from models.user_session import UserSession
+
+
+class SessionStore:
+    """
+    Session store interface
+
+    A session record is a dict with the keys "user_id" and "created_at"
+    (a datetime, or None when not tracked).
+    """
+
+    def set(self, session_id: str, user_id: str, created_at=None):
+        """
+        Store a session.
+
+        Args:
+            session_id (str): The Session ID.
+            user_id (str): The user ID.
+            created_at (datetime): The creation time, or None.
+        """
+        raise NotImplementedError()
+
+    def get(self, session_id: str) -> dict:
+        """
+        Get a session record.
+
+        Args:
+            session_id (str): The Session ID.
+
+        Returns:
+            dict: The session record, or None if not found.
+        """
+        raise NotImplementedError()
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Delete a session.
+
+        Args:
+            session_id (str): The Session ID.
+
+        Returns:
+            bool: True if the session existed, False otherwise.
+        """
+        raise NotImplementedError()
+
+    def touch(self, session_id: str, user_id: str, refreshed_at):
+        """
+        Restart the lifetime of a session.
+
+        Args:
+            session_id (str): The Session ID.
+            user_id (str): The user ID.
+            refreshed_at (datetime): The new start of the session lifetime.
+        """
+        self.set(session_id, user_id, refreshed_at)
+
+    def count(self) -> int:
+        """
+        Count the stored sessions.
+
+        Returns:
+            int: The number of sessions.
+        """
+        raise NotImplementedError()
+
+    def memory_usage(self) -> int:
+        """
+        Estimate the memory used by the sessions in this process.
+
+        Returns:
+            int: A number of bytes.
+        """
+        return 0
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Session store in a dict of the current process
+
+    Sessions without a creation time are stored as their user ID, the
+    others as {"user_id": ..., "created_at": ...}.
+    """
+
+    def __init__(self, sessions: dict = None):
+        """
+        Initialize the store.
+
+        Args:
+            sessions (dict): The dict holding the sessions.
+        """
+        self.sessions = sessions if sessions is not None else {}
+
+    def set(self, session_id: str, user_id: str, created_at=None):
+        """
+        Store a session.
+        """
+        if created_at is None:
+            self.sessions[session_id] = user_id
+        else:
+            self.sessions[session_id] = {
+                "user_id": user_id,
+                "created_at": created_at
+            }
+
+    def get(self, session_id: str) -> dict:
+        """
+        Get a session record.
+        """
+        value = self.sessions.get(session_id)
+        if value is None or isinstance(value, dict):
+            return value
+        return {"user_id": value, "created_at": None}
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Delete a session.
+        """
+        return self.sessions.pop(session_id, None) is not None
+
+    def count(self) -> int:
+        """
+        Count the stored sessions.
+        """
+        return len(self.sessions)
+
+    def memory_usage(self) -> int:
+        """
+        Estimate the memory used by the sessions, from the size of the
+        dict and of one of its entries.
+        """
+        size = sys.getsizeof(self.sessions)
+        for session_id, value in self.sessions.items():
+            entry = sys.getsizeof(session_id) + sys.getsizeof(value)
+            if isinstance(value, dict):
+                entry += sum(sys.getsizeof(v) for v in value.values())
+            return size + entry * len(self.sessions)
+        return size
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store in a SQLite database in WAL mode
+
+    Every worker process of the host opening the same database file sees
+    the same sessions, without a network service.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the store and create its table if needed.
+
+        Args:
+            db_path (str): Path of the database file.
+        """
+        self.db_path = db_path
+        self.__local = threading.local()
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, "
+            "created_at REAL) WITHOUT ROWID"
+        )
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Connection of the current thread.
+        """
+        conn = getattr(self.__local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.__local.conn = conn
+        return conn
+
+    def set(self, session_id: str, user_id: str, created_at=None):
+        """
+        Store a session.
+        """
+        timestamp = None if created_at is None else created_at.timestamp()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, user_id, "
+            "created_at) VALUES (?, ?, ?)",
+            (session_id, user_id, timestamp)
+        )
+
+    def get(self, session_id: str) -> dict:
+        """
+        Get a session record.
+        """
+        row = self._connection.execute(
+            "SELECT user_id, created_at FROM sessions WHERE session_id = ?",
+            (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        created_at = None if row[1] is None else \
+            datetime.fromtimestamp(row[1])
+        return {"user_id": row[0], "created_at": created_at}
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Delete a session.
+        """
+        cursor = self._connection.execute(
+            "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+        )
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        """
+        Count the stored sessions.
+        """
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+class UserSessionStore(SessionStore):
+    """
+    Session store of UserSession objects
+
+    Sessions are found through the session_id index of the storage, so
+    each operation costs the same whatever the number of sessions. The
+    start of a session lifetime is the updated_at of its UserSession.
+
+    Refreshes are queued and saved together once touch_batch of them are
+    pending, or when flush() is called; a session refreshed several times
+    in between is saved once.
+    """
+
+    def __init__(self, touch_batch: int = 100):
+        """
+        Initialize the store and load the saved sessions.
+
+        Args:
+            touch_batch (int): Number of pending refreshes saved at once.
+        """
+        self.touch_batch = touch_batch
+        self._pending = {}
+        self._lock = threading.Lock()
+        UserSession.load_from_file()
+
+    @staticmethod
+    def _find(session_id: str) -> UserSession:
+        """
+        Get the UserSession of a Session ID, or None.
+        """
+        user_sessions = UserSession.search({"session_id": session_id})
+        return user_sessions[0] if user_sessions else None
+
+    def set(self, session_id: str, user_id: str, created_at=None):
+        """
+        Store a session; its lifetime starts when it is saved.
+        """
+        user_session = self._find(session_id)
+        if user_session is None:
+            user_session = UserSession(user_id=user_id,
+                                       session_id=session_id)
+        user_session.user_id = user_id
+        with self._lock:
+            self._pending.pop(session_id, None)
+        user_session.save()
+
+    def get(self, session_id: str) -> dict:
+        """
+        Get a session record, with its pending refresh if any.
+        """
+        user_session = self._find(session_id)
+        if user_session is None:
+            return None
+        created_at = self._pending.get(session_id, user_session.updated_at)
+        return {"user_id": user_session.user_id, "created_at": created_at}
+
+    def touch(self, session_id: str, user_id: str, refreshed_at):
+        """
+        Queue the refresh of a session.
+        """
+        with self._lock:
+            self._pending[session_id] = refreshed_at
+            full = len(self._pending) >= self.touch_batch
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Save the UserSession of every refreshed session, with the time
+        of its last refresh as updated_at.
+
+        Returns:
+            int: The number of sessions saved.
+        """
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        saved = 0
+        for session_id, refreshed_at in pending.items():
+            user_session = self._find(session_id)
+            if user_session is not None:
+                user_session.updated_at = refreshed_at
+                user_session.save(stamp=False)
+                saved += 1
+        return saved
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Delete a session.
+        """
+        with self._lock:
+            self._pending.pop(session_id, None)
+        user_session = self._find(session_id)
+        if user_session is None:
+            return False
+        user_session.remove()
+        return True
+
+    def count(self) -> int:
+        """
+        Count the stored sessions.
+        """
+        return UserSession.count()
+
+    def all(self):
+        """
+        Iterate over the (session ID, session record) items.
+        """
+        for user_session in UserSession.all():
+            yield user_session.session_id, {
+                "user_id": user_session.user_id,
+                "created_at": self._pending.get(user_session.session_id,
+                                                user_session.updated_at)
+            }
+
+
+def get_session_store(sessions: dict = None) -> SessionStore:
+    """
+    Create the session store selected by the SESSION_STORE environment
+    variable: "memory" (default) or "sqlite".
+
+    Args:
+        sessions (dict): The dict used by the memory store.
+
+    Returns:
+        SessionStore: The session store.
+    """
+    store_type = os.environ.get("SESSION_STORE", "memory")
+    if store_type == "sqlite":
+        return SQLiteSessionStore(
+            os.environ.get("SESSION_STORE_PATH", ".db_sessions.sqlite3")
+        )
+    return MemorySessionStore(sessions)
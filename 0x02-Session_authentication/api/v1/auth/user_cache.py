@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+User cache module
+
+This module defines the cache of the users resolved from credentials or
+session IDs, so that authenticating a request does not resolve the user
+again while the cached entry is fresh.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from models.user import User
+
+
+class UserCache:
+    """
+    Bounded least recently used cache of users, with a time to live
+
+    Entries are keyed by a credential token (an Authorization header or a
+    session ID) and dropped when they expire, when the cache is full and
+    they are the least recently used, or when their user is saved or
+    removed in this process.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries; 0 disables the cache.
+            ttl (float): Lifetime of an entry in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tokens_by_user_id = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        """
+        Get the user cached for a token.
+
+        Args:
+            token: The credential token.
+
+        Returns:
+            User: The cached user, or None if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                self._drop(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return user
+
+    def set(self, token, user, ttl: float = None):
+        """
+        Cache the user of a token.
+
+        Args:
+            token: The credential token.
+            user (User): The resolved user.
+            ttl (float): Lifetime of the entry if shorter than the cache
+            one, in seconds.
+        """
+        if self.maxsize <= 0 or user is None:
+            return
+        if ttl is None or ttl > self.ttl:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (time.monotonic() + ttl, user)
+            self._tokens_by_user_id.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, token):
+        """
+        Remove an entry; the lock must be held.
+        """
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user_id.get(entry[1].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user_id[entry[1].id]
+
+    def invalidate(self, token):
+        """
+        Remove the entry of a token.
+
+        Args:
+            token: The credential token.
+        """
+        with self._lock:
+            self._drop(token)
+
+    def invalidate_user(self, user_id: str):
+        """
+        Remove every entry of a user.
+
+        Args:
+            user_id (str): The user ID.
+        """
+        with self._lock:
+            for token in list(self._tokens_by_user_id.get(user_id, ())):
+                self._drop(token)
+
+    def clear(self):
+        """
+        Remove every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user_id.clear()
+
+    def __len__(self) -> int:
+        """
+        Number of entries, expired ones included.
+        """
+        return len(self._entries)
+
+
+def _float_env(name: str, default: float) -> float:
+    """
+    Read a number from the environment, or default if missing or invalid.
+    """
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+user_cache = UserCache(int(_float_env("USER_CACHE_SIZE", 10000)),
+                       _float_env("USER_CACHE_TTL", 60))
+User.add_listener(lambda event, user: user_cache.invalidate_user(user.id))
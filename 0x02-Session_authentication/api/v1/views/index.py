@@ -3,9 +3,10 @@
 Module of Index views
 """
 
-from flask import jsonify, Blueprint, abort
+from flask import jsonify, Blueprint, abort, Response
 from werkzeug.exceptions import HTTPException, Unauthorized, Forbidden
 from api.v1.views import app_views
+from api.v1 import instrumentation
 
 # Create a Blueprint for the views
 app_views = Blueprint("app_views", __name__)
@@ -48,3 +49,17 @@ def stats() -> str:
     stats = {}
     stats['users'] = User.count()
     return jsonify(stats), 200
+
+
+@app_views.route('/metrics/', strict_slashes=False)
+def metrics() -> str:
+    """
+    GET /api/v1/metrics
+    Returns:
+      - the authentication timing histograms in the Prometheus text
+        format, or 404 if AUTH_METRICS is not set
+    """
+    if not instrumentation.ENABLED:
+        abort(404)
+    return Response(instrumentation.histograms.render(),
+                    mimetype="text/plain; version=0.0.4")
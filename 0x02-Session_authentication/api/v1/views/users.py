@@ -2,18 +2,93 @@
 """ Module of Users views
 """
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, jsonify, request, Response
 from models.user import User
+from os import getenv
+import json
+
+# Users per page when no limit is given, and largest limit accepted
+USERS_PAGE_SIZE = int(getenv("USERS_PAGE_SIZE", 100))
+USERS_PAGE_MAX = int(getenv("USERS_PAGE_MAX", 1000))
+
+
+def _stream_users(cursor: int, offset: int = 0, limit: int = None):
+    """ Generate a JSON array of the users following cursor, skipping the
+    first offset ones, read USERS_PAGE_SIZE users at a time from a single
+    cursor
+    """
+    size = max(USERS_PAGE_SIZE, 1)
+    yield "["
+    separator = ""
+    while limit is None or limit > 0:
+        users, cursor = User.page_after(cursor, size)
+        batch = users[offset:]
+        offset = max(offset - len(users), 0)
+        if limit is not None:
+            batch = batch[:limit]
+            limit -= len(batch)
+        for user in batch:
+            yield separator + json.dumps(user.to_json())
+            separator = ","
+        if len(users) < size:
+            break
+    yield "]\n"
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """ GET /api/v1/users
+    Query parameters:
+      - cursor: value of the previous page, the users following it are
+        returned (default 0, from the first user)
+      - offset: number of users skipped instead of a cursor
+      - limit: number of users returned (default USERS_PAGE_SIZE, at most
+        USERS_PAGE_MAX)
+      - stream: if 1, stream every user from cursor or offset, or limit
+        users if given, without the USERS_PAGE_MAX cap
     Return:
-      - list of all User objects JSON represented
+      - list of User objects JSON represented, with a Link header to the
+        next page and the total in X-Total-Count
+      - 400 if cursor, offset or limit is not a valid number, or if both
+        cursor and offset are given
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    try:
+        cursor = int(request.args.get('cursor', 0))
+        offset = int(request.args.get('offset', 0))
+        limit = request.args.get('limit')
+        limit = None if limit is None else int(limit)
+    except ValueError:
+        return jsonify({'error': "cursor, offset and limit must be "
+                                 "integers"}), 400
+    if cursor < 0 or offset < 0 or (limit is not None and limit < 0):
+        return jsonify({'error': "cursor, offset and limit must be "
+                                 "positive"}), 400
+    if 'cursor' in request.args and 'offset' in request.args:
+        return jsonify({'error': "cursor and offset are exclusive"}), 400
+
+    if request.args.get('stream') in ('1', 'true'):
+        return Response(_stream_users(cursor, offset, limit),
+                        mimetype='application/json')
+
+    if limit is None:
+        limit = USERS_PAGE_SIZE
+    limit = min(limit, USERS_PAGE_MAX)
+    total = User.count()
+    next_page = None
+    if 'offset' in request.args:
+        users = User.page(offset, limit)
+        if limit > 0 and offset + limit < total:
+            next_page = "offset={}".format(offset + limit)
+    else:
+        users, cursor = User.page_after(cursor, limit)
+        if limit > 0 and len(users) == limit:
+            next_page = "cursor={}".format(cursor)
+    response = jsonify([user.to_json() for user in users])
+    response.headers['X-Total-Count'] = str(total)
+    if next_page is not None:
+        response.headers['Link'] = '<{}?{}&limit={}>; rel="next"' \
+            .format(request.base_url, next_page, limit)
+    return response
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+""" Benchmark: SessionDBAuth lookups per second with many stored sessions,
+against the former linear scan of every UserSession
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("SESSION_DURATION", "3600")
+os.environ.setdefault("SESSION_REAP_INTERVAL", "0")
+
+from api.v1.auth.session_db_auth import SessionDBAuth  # noqa: E402
+from models.user_session import UserSession  # noqa: E402
+
+
+def legacy_lookup(session_id: str) -> str:
+    """ Former lookup: scan every UserSession
+    """
+    for user_session in UserSession.all():
+        if user_session.session_id == session_id:
+            return user_session.user_id
+    return None
+
+
+def rate(func, args: list) -> float:
+    """ Calls of func per second over args
+    """
+    start = time.perf_counter()
+    for arg in args:
+        func(arg)
+    return len(args) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    calls = 10000
+    session_name = os.environ.get('SESSION_NAME', '_my_session_id')
+
+    auth = SessionDBAuth()
+    start = time.perf_counter()
+    for i in range(count - UserSession.count()):
+        auth.create_session("user-{}".format(i))
+    UserSession.flush()
+    print("stored sessions: {} ({:.1f}s to create)".format(
+        UserSession.count(), time.perf_counter() - start))
+
+    session_ids = [s.session_id for s, _ in zip(UserSession.all(),
+                                                range(calls))]
+    requests = [SimpleNamespace(cookies={session_name: session_id})
+                for session_id in session_ids]
+
+    print("lookup: {:.0f} requests/sec".format(
+        rate(lambda r: auth.user_id_for_session_id(auth.session_cookie(r)),
+             requests)))
+    print("legacy lookup: {:.1f} requests/sec".format(
+        rate(legacy_lookup, [s.session_id
+                             for s in list(UserSession.all())[-3:]])))
+    print("create: {:.0f} sessions/sec".format(
+        rate(auth.create_session, ["bench-user"] * calls)))
+    print("destroy: {:.0f} sessions/sec".format(
+        rate(auth.destroy_session, requests)))
+    UserSession.flush()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+""" Memory benchmark: bytes per User with the former __dict__ layout and
+with the __slots__ layout
+"""
+import json
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from models.base import TIMESTAMP_FORMAT
+from models.user import User
+
+
+class DictUser():
+    """ User with the former layout: a per-instance __dict__ and parsed
+    timestamps
+    """
+
+    def __init__(self, **kwargs):
+        """ Initialize like the former Base and User
+        """
+        self.id = kwargs.get('id')
+        self.created_at = datetime.strptime(kwargs.get('created_at'),
+                                            TIMESTAMP_FORMAT)
+        self.updated_at = datetime.strptime(kwargs.get('updated_at'),
+                                            TIMESTAMP_FORMAT)
+        self.email = kwargs.get('email')
+        self._password = kwargs.get('_password')
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+
+
+def bytes_per_user(cls, text: str) -> float:
+    """ Measure the memory kept per object built from the JSON list text,
+    decoded like a snapshot so that each object gets its own strings
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [cls(**obj_json) for obj_json in json.loads(text)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(objs)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    start = datetime(2023, 8, 9)
+    objs_json = []
+    for i in range(count):
+        created_at = start + timedelta(seconds=i)
+        # Half of the users were updated after their creation
+        updated_at = created_at + timedelta(days=i % 2)
+        objs_json.append({
+            "id": "{:08d}-61c4-40e9-9bb8-26419b2e2ac8".format(i),
+            "created_at": created_at.strftime(TIMESTAMP_FORMAT),
+            "updated_at": updated_at.strftime(TIMESTAMP_FORMAT),
+            "email": "user{}@hbtn.io".format(i),
+            "_password": "{:064x}".format(i),
+            "first_name": None,
+            "last_name": None
+        })
+    text = json.dumps(objs_json)
+    del objs_json
+
+    before = bytes_per_user(DictUser, text)
+    after = bytes_per_user(User, text)
+    print("before (__dict__): {:.0f} bytes/user".format(before))
+    print("after (__slots__): {:.0f} bytes/user".format(after))
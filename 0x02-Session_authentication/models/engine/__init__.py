@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+""" Storage engine selection
+
+STORAGE_TYPE picks the backend of the models: "json" (default) keeps
+objects in memory with a JSON snapshot and journal per class, "sqlite"
+keeps them in the SQLite database SQLITE_DB_PATH, shared by every
+process of the host.
+"""
+from os import getenv
+from models.engine.storage import Storage
+
+storage_type = getenv("STORAGE_TYPE", "json")
+
+if storage_type == "sqlite":
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage(getenv("SQLITE_DB_PATH", ".db.sqlite3"))
+elif storage_type == "json":
+    from models.engine.json_storage import JSONStorage
+    storage = JSONStorage()
+else:
+    raise ValueError("Invalid STORAGE_TYPE: {}".format(storage_type))
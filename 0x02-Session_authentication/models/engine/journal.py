@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+""" Journal module
+"""
+import json
+import os
+import threading
+from typing import Iterator, Tuple
+
+
+class Journal():
+    """ Append-only log of the upserts and deletes of one model class
+
+    Each line is a JSON entry: {"op": "upsert"|"delete", "id": ...,
+    "obj": {...}}. The journal is replayed on top of the snapshot file, and
+    rotated out when a new snapshot is written.
+
+    Appended entries are buffered and written in groups. The durability
+    mode decides when commit() returns:
+      - "async": immediately; a flusher thread writes the buffer every
+        flush_interval seconds, or as soon as max_pending entries wait
+      - "sync": once the entry is written to the file
+      - "fsync": once the entry is written and fsynced
+    In "sync" and "fsync" modes, concurrent writers share one write: the
+    first one writes every entry buffered so far and the others wait.
+    """
+
+    DURABILITY_MODES = ("async", "sync", "fsync")
+
+    def __init__(self, file_path: str, durability: str = "async",
+                 flush_interval: float = 1.0, max_pending: int = 100):
+        """ Initialize a Journal writing to file_path
+        """
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError("Invalid durability mode: {}".format(durability))
+        self.file_path = file_path
+        self.rotated_path = file_path + ".compacting"
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.entries = 0
+        self.lock = threading.RLock()
+        self.cond = threading.Condition(self.lock)
+        self.compact_lock = threading.Lock()
+        self.__file = None
+        self.__pending = []
+        self.__appended = 0
+        self.__flushed = 0
+        self.__flushing = False
+        self.__flusher = None
+
+    def append(self, op: str, obj_id: str, obj_json: dict = None) -> int:
+        """ Buffer an entry, to be written by the next group commit
+
+        Returns:
+            int: The sequence number of the entry, to pass to commit()
+        """
+        entry = {"op": op, "id": obj_id}
+        if obj_json is not None:
+            entry["obj"] = obj_json
+        line = json.dumps(entry) + "\n"
+        with self.lock:
+            self.__pending.append(line)
+            self.__appended += 1
+            self.entries += 1
+            return self.__appended
+
+    def commit(self, seq: int):
+        """ Make the entry seq durable according to the durability mode
+        """
+        if self.durability != "async":
+            self.flush(seq)
+            return
+        with self.lock:
+            if self.__flusher is None or not self.__flusher.is_alive():
+                self.__flusher = threading.Thread(target=self.__run,
+                                                  daemon=True)
+                self.__flusher.start()
+            if len(self.__pending) >= self.max_pending:
+                self.cond.notify_all()
+
+    def __run(self):
+        """ Flusher thread of the "async" mode
+        """
+        while True:
+            with self.lock:
+                self.cond.wait_for(
+                    lambda: len(self.__pending) >= self.max_pending,
+                    timeout=self.flush_interval)
+            self.flush()
+
+    def flush(self, seq: int = None):
+        """ Write the buffered entries, up to seq or all of them
+        """
+        with self.lock:
+            target = self.__appended if seq is None else seq
+            while self.__flushed < target and self.__flushing:
+                self.cond.wait()
+            if self.__flushed >= target:
+                return
+            lines, self.__pending = self.__pending, []
+            end = self.__appended
+            self.__flushing = True
+        try:
+            self.__write(lines)
+        finally:
+            with self.lock:
+                self.__flushed = end
+                self.__flushing = False
+                self.cond.notify_all()
+
+    def __write(self, lines: list):
+        """ Write lines to the journal file
+        """
+        if self.__file is None:
+            self.__file = open(self.file_path, 'a')
+        self.__file.write("".join(lines))
+        self.__file.flush()
+        if self.durability == "fsync":
+            os.fsync(self.__file.fileno())
+
+    def replay(self) -> Iterator[Tuple[str, str, dict]]:
+        """ Iterate over the (op, id, obj) entries, oldest first
+
+        Entries of a rotated journal left by an interrupted compaction come
+        first. A last line without its newline, torn by a crash, is ignored
+        and cut from the file, so that the next entry appended is not
+        written onto it.
+        """
+        self.flush()
+        self.entries = 0
+        for file_path in (self.rotated_path, self.file_path):
+            if not os.path.exists(file_path):
+                continue
+            end = 0
+            with open(file_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    end += len(line)
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries += 1
+                    yield entry["op"], entry["id"], entry.get("obj")
+            self.__truncate(file_path, end)
+
+    def __truncate(self, file_path: str, size: int):
+        """ Cut file_path to size bytes, if longer
+        """
+        if os.path.getsize(file_path) <= size:
+            return
+        with open(file_path, 'r+b') as f:
+            f.truncate(size)
+            if self.durability == "fsync":
+                os.fsync(f.fileno())
+
+    def rotate(self):
+        """ Move the current entries aside before writing a snapshot
+
+        Must be called with the lock held, and the snapshot taken before
+        releasing it: later entries go to a new journal. May wait for a
+        group commit in progress, releasing the lock meanwhile.
+        """
+        while self.__flushing:
+            self.cond.wait()
+        if self.__pending:
+            self.__write(self.__pending)
+            self.__pending = []
+            self.__flushed = self.__appended
+            self.cond.notify_all()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        if not os.path.exists(self.file_path):
+            return
+        if os.path.exists(self.rotated_path):
+            with open(self.file_path, 'r') as src, \
+                    open(self.rotated_path, 'a') as dst:
+                dst.write(src.read())
+            os.remove(self.file_path)
+        else:
+            os.replace(self.file_path, self.rotated_path)
+        self.entries = 0
+
+    def discard_rotated(self):
+        """ Remove the rotated entries once the snapshot is written
+        """
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+""" JSON storage module
+
+Objects live in the module-level DATA dict of each process. Each class is
+persisted to a .db_<Class>.json snapshot plus a .db_<Class>.journal of the
+changes made since.
+"""
+from bisect import bisect_right
+from itertools import islice
+from typing import TypeVar, List, Iterable, Iterator, Tuple
+from os import path, getenv
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from models.engine.journal import Journal
+from models.engine.storage import Storage, LOAD_STATS
+
+
+# Number of journal entries after which a snapshot is written
+JOURNAL_COMPACT_THRESHOLD = int(getenv("DB_JOURNAL_COMPACT_THRESHOLD", 1000))
+# Group commit settings, see models.engine.journal.Journal
+DB_DURABILITY = getenv("DB_DURABILITY", "async")
+DB_FLUSH_INTERVAL = float(getenv("DB_FLUSH_INTERVAL", 1.0))
+DB_FLUSH_MAX_PENDING = int(getenv("DB_FLUSH_MAX_PENDING", 100))
+DATA = {}
+JOURNALS = {}
+# INDEXES[class name][attribute][value] -> {object id: object}
+INDEXES = {}
+# INDEXED_VALUES[class name][object id] -> {attribute: indexed value}
+INDEXED_VALUES = {}
+# ORDERS[class name] -> _Order of its objects, for keyset paging
+ORDERS = {}
+SNAPSHOT_CHUNK_SIZE = 1 << 16
+
+logger = logging.getLogger(__name__)
+
+
+def flush():
+    """ Write the pending changes of every class to their journals
+    """
+    for journal in list(JOURNALS.values()):
+        journal.flush()
+
+
+atexit.register(flush)
+
+
+def _iter_snapshot(file_path: str) -> Iterator[Tuple[str, dict]]:
+    """ Iterate over the (id, object JSON) items of a snapshot file
+
+    The file is read in chunks and each object is decoded on its own, so
+    the whole file is never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    state = "start"
+    key = None
+    with open(file_path, 'r') as f:
+        buf = f.read(SNAPSHOT_CHUNK_SIZE)
+        eof = len(buf) == 0
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buf):
+                if eof:
+                    raise ValueError("Truncated snapshot: " + file_path)
+                buf = f.read(SNAPSHOT_CHUNK_SIZE)
+                eof = len(buf) == 0
+                pos = 0
+                continue
+
+            char = buf[pos]
+            if state == "start" and char == "{":
+                state = "first_key"
+                pos += 1
+            elif state in ("first_key", "next") and char == "}":
+                return
+            elif state == "next" and char == ",":
+                state = "key"
+                pos += 1
+            elif state == "colon" and char == ":":
+                state = "value"
+                pos += 1
+            elif state in ("first_key", "key", "value"):
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    chunk = f.read(SNAPSHOT_CHUNK_SIZE)
+                    eof = len(chunk) == 0
+                    buf = buf[pos:] + chunk
+                    pos = 0
+                    continue
+                pos = end
+                if state == "value":
+                    yield key, item
+                    state = "next"
+                else:
+                    key = item
+                    state = "colon"
+            else:
+                raise ValueError("Invalid snapshot: " + file_path)
+
+
+class _Order():
+    """ Order in which the objects of a class were first saved
+
+    Each object gets an increasing sequence number, the equivalent of a
+    SQLite rowid, which page_after() uses as cursor. Removed objects stay
+    in the lists and are skipped, until they outnumber the others.
+    """
+
+    def __init__(self, ids: Iterable[str] = ()):
+        """ Number ids in order
+        """
+        self.seqs = []
+        self.ids = []
+        self.live = {}
+        self.last = 0
+        for obj_id in ids:
+            self.add(obj_id)
+
+    def add(self, obj_id: str):
+        """ Number obj_id, unless it already is
+        """
+        if obj_id in self.live:
+            return
+        self.last += 1
+        self.live[obj_id] = self.last
+        self.seqs.append(self.last)
+        self.ids.append(obj_id)
+
+    def discard(self, obj_id: str):
+        """ Forget obj_id
+        """
+        if self.live.pop(obj_id, None) is None:
+            return
+        if len(self.ids) > 2 * len(self.live) + 64:
+            kept = [(seq, i) for seq, i in zip(self.seqs, self.ids)
+                    if self.live.get(i) == seq]
+            self.seqs = [seq for seq, _ in kept]
+            self.ids = [i for _, i in kept]
+
+    def after(self, cursor: int, limit: int) -> List[Tuple[int, str]]:
+        """ Return at most limit (sequence number, id) items following
+        cursor
+        """
+        items = []
+        pos = bisect_right(self.seqs, cursor)
+        while pos < len(self.ids) and len(items) < limit:
+            seq, obj_id = self.seqs[pos], self.ids[pos]
+            if self.live.get(obj_id) == seq:
+                items.append((seq, obj_id))
+            pos += 1
+        return items
+
+
+class JSONStorage(Storage):
+    """ In-memory storage persisted to JSON files
+    """
+
+    def _objects(self, cls) -> dict:
+        """ Get the {id: object} dict of cls
+        """
+        return DATA.setdefault(cls.__name__, {})
+
+    def load(self, cls):
+        """ Load all objects of cls from file
+
+        The snapshot is parsed one object at a time, and the timestamps of
+        each object are converted to datetimes as it is built. Load time
+        and object count are logged and kept in LOAD_STATS.
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        start = time.perf_counter()
+        DATA[s_class] = {}
+        if path.exists(file_path):
+            for obj_id, obj_json in _iter_snapshot(file_path):
+                DATA[s_class][obj_id] = cls(**obj_json)
+
+        for op, obj_id, obj_json in self._journal(cls).replay():
+            if op == "delete":
+                DATA[s_class].pop(obj_id, None)
+            else:
+                DATA[s_class][obj_id] = cls(**obj_json)
+        self._rebuild_indexes(cls)
+        ORDERS[s_class] = _Order(DATA[s_class])
+
+        stats = {
+            "count": len(DATA[s_class]),
+            "seconds": time.perf_counter() - start
+        }
+        LOAD_STATS[s_class] = stats
+        logger.info("Loaded %d %s objects in %.3fs",
+                    stats["count"], s_class, stats["seconds"])
+
+    def _journal(self, cls) -> Journal:
+        """ Get the journal of cls
+        """
+        s_class = cls.__name__
+        if s_class not in JOURNALS:
+            JOURNALS[s_class] = Journal(".db_{}.journal".format(s_class),
+                                        DB_DURABILITY, DB_FLUSH_INTERVAL,
+                                        DB_FLUSH_MAX_PENDING)
+        return JOURNALS[s_class]
+
+    def flush(self, cls=None):
+        """ Write the pending changes of cls, or of every class, to their
+        journals
+        """
+        if cls is None:
+            flush()
+        else:
+            self._journal(cls).flush()
+
+    def _order(self, cls) -> _Order:
+        """ Get the _Order of cls
+        """
+        s_class = cls.__name__
+        if s_class not in ORDERS:
+            ORDERS[s_class] = _Order(self._objects(cls))
+        return ORDERS[s_class]
+
+    def _compact_if_needed(self, cls):
+        """ Write a snapshot in the background once the journal is long
+        """
+        journal = self._journal(cls)
+        if journal.entries < JOURNAL_COMPACT_THRESHOLD or \
+                journal.compact_lock.locked():
+            return
+        threading.Thread(target=self.save_all, args=(cls,),
+                         daemon=True).start()
+
+    def _rebuild_indexes(self, cls):
+        """ Rebuild the indexes of cls from DATA
+        """
+        s_class = cls.__name__
+        INDEXES[s_class] = {attr: {} for attr in cls._indexes}
+        INDEXED_VALUES[s_class] = {}
+        for obj in DATA.get(s_class, {}).values():
+            self._index(obj)
+
+    def _index(self, obj: TypeVar('Base')):
+        """ Add or move obj in the indexes of its class
+
+        Buckets are updated even when a value did not change, since obj may
+        be a new instance saved in place of the indexed one.
+        """
+        s_class = obj.__class__.__name__
+        indexes = INDEXES.setdefault(
+            s_class, {attr: {} for attr in obj._indexes})
+        indexed = INDEXED_VALUES.setdefault(s_class, {})
+        old_values = indexed.get(obj.id, {})
+        new_values = {}
+        for attr in obj._indexes:
+            value = getattr(obj, attr, None)
+            if attr in old_values and old_values[attr] != value:
+                self._unindex_value(obj, attr, old_values[attr])
+            try:
+                indexes[attr].setdefault(value, {})[obj.id] = obj
+            except TypeError:
+                continue
+            new_values[attr] = value
+        indexed[obj.id] = new_values
+
+    def _unindex(self, obj: TypeVar('Base')):
+        """ Remove obj from the indexes of its class
+        """
+        s_class = obj.__class__.__name__
+        old_values = INDEXED_VALUES.get(s_class, {}).pop(obj.id, {})
+        for attr, value in old_values.items():
+            self._unindex_value(obj, attr, value)
+
+    def _unindex_value(self, obj: TypeVar('Base'), attr: str, value):
+        """ Remove obj from one bucket of an index
+        """
+        index = INDEXES[obj.__class__.__name__][attr]
+        bucket = index.get(value)
+        if bucket is not None:
+            bucket.pop(obj.id, None)
+            if not bucket:
+                del index[value]
+
+    def save_all(self, cls):
+        """ Save all objects of cls to file
+
+        Writes a full snapshot and drops the journal entries it contains.
+        Objects saved meanwhile go to a new journal.
+        """
+        file_path = ".db_{}.json".format(cls.__name__)
+        journal = self._journal(cls)
+        with journal.compact_lock:
+            with journal.lock:
+                journal.rotate()
+                objs = list(self._objects(cls).values())
+            objs_json = {}
+            for obj in objs:
+                objs_json[obj.id] = obj.to_json(True)
+
+            tmp_path = file_path + ".tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(objs_json, f)
+                if journal.durability == "fsync":
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+            journal.discard_rotated()
+
+    def save(self, obj: TypeVar('Base')):
+        """ Save obj
+
+        Appends the object to the journal of its class instead of rewriting
+        the whole file. The entry is written by a group commit.
+        """
+        cls = obj.__class__
+        journal = self._journal(cls)
+        with journal.lock:
+            self._objects(cls)[obj.id] = obj
+            self._order(cls).add(obj.id)
+            self._index(obj)
+            seq = journal.append("upsert", obj.id, obj.to_json(True))
+        journal.commit(seq)
+        self._compact_if_needed(cls)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove obj
+        """
+        cls = obj.__class__
+        journal = self._journal(cls)
+        with journal.lock:
+            objs = self._objects(cls)
+            if objs.get(obj.id) is None:
+                return
+            del objs[obj.id]
+            self._order(cls).discard(obj.id)
+            self._unindex(obj)
+            seq = journal.append("delete", obj.id)
+        journal.commit(seq)
+        self._compact_if_needed(cls)
+
+    def count(self, cls) -> int:
+        """ Count all objects of cls
+        """
+        return len(self._objects(cls))
+
+    def get(self, cls, id: str) -> TypeVar('Base'):
+        """ Return one object of cls by ID
+        """
+        return self._objects(cls).get(id)
+
+    def page(self, cls, offset: int, limit: int) -> List[TypeVar('Base')]:
+        """ Return at most limit objects of cls, skipping the first offset
+        ones, in insertion order
+
+        Only the page is copied; the journal lock keeps the objects from
+        changing while they are walked.
+        """
+        with self._journal(cls).lock:
+            return list(islice(self._objects(cls).values(),
+                               offset, offset + limit))
+
+    def page_after(self, cls, cursor: int,
+                   limit: int) -> Tuple[List[TypeVar('Base')], int]:
+        """ Return at most limit objects of cls following cursor, and the
+        cursor of the last one, in insertion order
+
+        The start of the page is found by bisection, so the journal lock
+        is held for the page only, whatever its position.
+        """
+        with self._journal(cls).lock:
+            objs = self._objects(cls)
+            items = self._order(cls).after(cursor, limit)
+            page = [objs[obj_id] for _, obj_id in items]
+        return page, items[-1][0] if items else cursor
+
+    def search(self, cls, attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects of cls with matching attributes
+
+        When an attribute is indexed, only the objects saved with that
+        value are checked instead of every object of the class.
+        """
+        candidates = self._objects(cls).values()
+        indexes = INDEXES.get(cls.__name__, {})
+        for k, v in attributes.items():
+            if k in indexes:
+                try:
+                    candidates = indexes[k].get(v, {}).values()
+                except TypeError:
+                    continue
+                break
+        return [obj for obj in candidates if self.matches(obj, attributes)]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+""" SQLite storage module
+
+Each class has a table with the JSON of its objects and one indexed column
+per attribute of its _indexes. The database runs in WAL mode, so every
+worker process of the host reads and writes the same up to date store.
+"""
+from typing import TypeVar, List, Tuple
+import json
+import sqlite3
+import threading
+import time
+from models.engine.storage import Storage, LOAD_STATS
+
+# Types of attribute values stored in, and searched by, indexed columns
+SQL_TYPES = (str, int, float, type(None))
+
+
+class SQLiteStorage(Storage):
+    """ Storage in a SQLite database shared by processes
+    """
+
+    def __init__(self, db_path: str):
+        """ Initialize a SQLiteStorage on the database file db_path
+        """
+        self.db_path = db_path
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__statements = {}
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """ Connection of the current thread
+        """
+        conn = getattr(self.__local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.__local.conn = conn
+        return conn
+
+    def _statements(self, cls) -> dict:
+        """ Get the SQL statements of cls, creating its table on first use
+
+        The statements are built once per class, so sqlite3 reuses the
+        prepared statements of its cache for every call.
+        """
+        s_class = cls.__name__
+        statements = self.__statements.get(s_class)
+        if statements is not None:
+            return statements
+
+        with self.__lock:
+            if s_class in self.__statements:
+                return self.__statements[s_class]
+            table = '"{}"'.format(s_class)
+            columns = ['"{}"'.format(attr) for attr in cls._indexes]
+            conn = self._connection
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS {} (id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL{})".format(
+                    table, "".join(", " + c for c in columns)))
+            for attr in cls._indexes:
+                conn.execute(
+                    'CREATE INDEX IF NOT EXISTS "ix_{0}_{1}" ON {2} ("{1}")'
+                    .format(s_class, attr, table))
+            statements = {
+                "upsert": "INSERT INTO {} (id, data{}) VALUES (?, ?{}) "
+                          "ON CONFLICT (id) DO UPDATE SET {}".format(
+                              table, "".join(", " + c for c in columns),
+                              ", ?" * len(columns),
+                              ", ".join("{0} = excluded.{0}".format(c)
+                                        for c in ['data'] + columns)),
+                "delete": "DELETE FROM {} WHERE id = ?".format(table),
+                "get": "SELECT data FROM {} WHERE id = ?".format(table),
+                "count": "SELECT COUNT(*) FROM {}".format(table),
+                "select": "SELECT data FROM {}".format(table),
+                "page": "SELECT data FROM {} ORDER BY rowid "
+                        "LIMIT ? OFFSET ?".format(table),
+                "page_after": "SELECT rowid, data FROM {} WHERE rowid > ? "
+                              "ORDER BY rowid LIMIT ?".format(table),
+            }
+            self.__statements[s_class] = statements
+            return statements
+
+    def load(self, cls):
+        """ Create the table of cls if needed; objects are read on demand
+        """
+        start = time.perf_counter()
+        self._statements(cls)
+        LOAD_STATS[cls.__name__] = {
+            "count": self.count(cls),
+            "seconds": time.perf_counter() - start
+        }
+
+    def save_all(self, cls):
+        """ Nothing to do: every save is committed
+        """
+        pass
+
+    def flush(self, cls=None):
+        """ Nothing to do: every save is committed
+        """
+        pass
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or update obj
+        """
+        cls = obj.__class__
+        values = [obj.id, json.dumps(obj.to_json(True))]
+        for attr in cls._indexes:
+            value = getattr(obj, attr, None)
+            values.append(value if isinstance(value, SQL_TYPES) else None)
+        self._connection.execute(self._statements(cls)["upsert"], values)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete obj
+        """
+        self._connection.execute(
+            self._statements(obj.__class__)["delete"], (obj.id,))
+
+    def count(self, cls) -> int:
+        """ Count all objects of cls
+        """
+        return self._connection.execute(
+            self._statements(cls)["count"]).fetchone()[0]
+
+    def get(self, cls, id: str) -> TypeVar('Base'):
+        """ Return one object of cls by ID
+        """
+        row = self._connection.execute(
+            self._statements(cls)["get"], (id,)).fetchone()
+        if row is None:
+            return None
+        return cls(**json.loads(row[0]))
+
+    def page(self, cls, offset: int, limit: int) -> List[TypeVar('Base')]:
+        """ Return at most limit objects of cls, skipping the first offset
+        ones, in insertion order
+        """
+        rows = self._connection.execute(
+            self._statements(cls)["page"], (limit, offset))
+        return [cls(**json.loads(row[0])) for row in rows]
+
+    def page_after(self, cls, cursor: int,
+                   limit: int) -> Tuple[List[TypeVar('Base')], int]:
+        """ Return at most limit objects of cls following cursor, and the
+        cursor of the last one
+
+        Cursors are rowids, so a page is read from the rowid b-tree
+        instead of stepping over the rows before it.
+        """
+        rows = self._connection.execute(
+            self._statements(cls)["page_after"], (cursor, limit)).fetchall()
+        objs = [cls(**json.loads(row[1])) for row in rows]
+        return objs, rows[-1][0] if rows else cursor
+
+    def search(self, cls, attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Search all objects of cls with matching attributes
+
+        Indexed attributes are matched by the query, the others on the
+        loaded objects.
+        """
+        sql = self._statements(cls)["select"]
+        conditions = []
+        params = []
+        for k, v in attributes.items():
+            if k in cls._indexes and isinstance(v, SQL_TYPES):
+                conditions.append('"{}" IS ?'.format(k))
+                params.append(v)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY rowid"
+
+        objs = (cls(**json.loads(row[0]))
+                for row in self._connection.execute(sql, params))
+        return [obj for obj in objs if self.matches(obj, attributes)]
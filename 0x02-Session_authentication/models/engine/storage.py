@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+""" Storage module
+"""
+from itertools import islice
+from typing import TypeVar, List, Iterable, Tuple
+
+
+# LOAD_STATS[class name] -> {"count": objects loaded, "seconds": load time}
+LOAD_STATS = {}
+
+
+class Storage():
+    """ Storage backend interface of the models
+
+    Methods receive the model class, or the object, they apply to.
+    """
+
+    def load(self, cls):
+        """ Load the objects of cls from the backend
+        """
+        raise NotImplementedError()
+
+    def save_all(self, cls):
+        """ Persist every object of cls
+        """
+        raise NotImplementedError()
+
+    def flush(self, cls=None):
+        """ Write the pending changes of cls, or of every class
+        """
+        raise NotImplementedError()
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or update obj
+        """
+        raise NotImplementedError()
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete obj
+        """
+        raise NotImplementedError()
+
+    def count(self, cls) -> int:
+        """ Count the objects of cls
+        """
+        raise NotImplementedError()
+
+    def all(self, cls) -> Iterable[TypeVar('Base')]:
+        """ Return all objects of cls
+        """
+        return self.search(cls)
+
+    def page(self, cls, offset: int, limit: int) -> List[TypeVar('Base')]:
+        """ Return at most limit objects of cls, skipping the first offset
+        ones, in a stable order
+        """
+        return list(islice(self.all(cls), offset, offset + limit))
+
+    def page_after(self, cls, cursor: int,
+                   limit: int) -> Tuple[List[TypeVar('Base')], int]:
+        """ Return at most limit objects of cls following cursor, and the
+        cursor of the last one
+
+        Cursors are increasing keys of the objects, 0 coming before the
+        first one, so each page starts after the last object of the
+        previous one whatever was added or removed meanwhile.
+        """
+        raise NotImplementedError()
+
+    def get(self, cls, id: str) -> TypeVar('Base'):
+        """ Return the object of cls with this ID, or None
+        """
+        raise NotImplementedError()
+
+    def search(self, cls, attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Return the objects of cls with matching attributes
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def matches(obj: TypeVar('Base'), attributes: dict) -> bool:
+        """ Tell whether obj has all the given attribute values
+        """
+        for k, v in attributes.items():
+            if (getattr(obj, k) != v):
+                return False
+        return True
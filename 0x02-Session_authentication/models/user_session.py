@@ -7,7 +7,6 @@ session information stored in the database.
 """
 
 from models.base import Base
-from sqlalchemy import Column, String
 
 
 class UserSession(Base):
@@ -17,9 +16,8 @@ class UserSession(Base):
     This class defines the UserSession model with attributes
     user_id and session_id.
     """
-    __tablename__ = 'user_sessions'
-    user_id = Column(String(60), nullable=False)
-    session_id = Column(String(60), nullable=False)
+
+    _indexes = ('user_id', 'session_id')
 
     def __init__(self, *args: list, **kwargs: dict):
         """
@@ -30,3 +28,5 @@ class UserSession(Base):
             **kwargs (dict): Keyword arguments.
         """
         super().__init__(*args, **kwargs)
+        self.user_id = kwargs.get('user_id')
+        self.session_id = kwargs.get('session_id')
@@ -11,6 +11,14 @@ app = Flask(__name__)
 auth = Auth()
 
 
+@app.teardown_appcontext
+def close_db_session(exception=None) -> None:
+    """
+    Give the database connection of the request back to the pool.
+    """
+    auth.close_session()
+
+
 @app.route("/", methods=["GET"])
 def hello() -> str:
     """
@@ -2,10 +2,13 @@
 """auth module
 """
 
-from db import DB
+from concurrent.futures import ProcessPoolExecutor
+from db import DB, DB_BULK_BATCH_SIZE
+from itertools import islice
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 import bcrypt
-from typing import Union, Optional
+from typing import Iterable, Tuple, Union, Optional
 from user import User
 import uuid
 
@@ -19,8 +22,13 @@ class Auth:
         """
         self._db = DB()
 
+    def close_session(self) -> None:
+        """Release the database session of the current thread.
+        """
+        self._db.close_session()
+
     @staticmethod
-    def _hash_password(self, password: str) -> bytes:
+    def _hash_password(password: str) -> bytes:
         """
         Hash a password using bcrypt.
 
@@ -61,13 +69,47 @@ class Auth:
         Raises:
             ValueError: If a user with the same email already exists.
         """
+        hashed_password = self._hash_password(password)
         try:
-            existing_user = self._db.find_user_by(email=email)
+            return self._db.add_user(email, hashed_password)
+        except IntegrityError:
             raise ValueError(f"User {email} already exists")
-        except NoResultFound:
-            hashed_password = self._hash_password(password)
-            user = self._db.add_user(email, hashed_password)
-            return user
+
+    def register_users_bulk(self, users: Iterable[Tuple[str, str]],
+                            workers: int = None, batch_size: int = None,
+                            chunksize: int = 16) -> int:
+        """
+        Register many users.
+
+        Passwords are hashed in a pool of worker processes, one batch at
+        a time, and each batch is inserted in one transaction. On SQLite,
+        users whose email already exists are skipped.
+
+        Args:
+            users (iterable): (email, password) pairs.
+            workers (int): Worker processes, the number of CPUs by default.
+            batch_size (int): Users hashed and inserted together,
+            DB_BULK_BATCH_SIZE by default.
+            chunksize (int): Passwords sent to a worker at a time.
+
+        Returns:
+            int: The number of users registered.
+        """
+        batch_size = batch_size or DB_BULK_BATCH_SIZE
+        users = iter(users)
+        registered = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                batch = list(islice(users, batch_size))
+                if not batch:
+                    return registered
+                hashed_passwords = executor.map(
+                    self._hash_password,
+                    [password for _, password in batch],
+                    chunksize=chunksize)
+                registered += self._db.add_users_bulk(
+                    zip([email for email, _ in batch], hashed_passwords),
+                    batch_size)
 
     def valid_login(self, email: str, password: str) -> bool:
         """
@@ -112,7 +154,7 @@ class Auth:
         try:
             user = self._db.find_user_by(email=email)
             session_id = self._generate_uuid()
-            user.session_id = session_id
+            self._db.update_user(user.id, session_id=session_id)
             return session_id
         except NoResultFound:
             return None
@@ -147,8 +189,7 @@ class Auth:
             None
         """
         try:
-            user = self._db.find_user_by(id=user_id)
-            user.session_id = None
+            self._db.update_user(user_id, session_id=None)
         except NoResultFound:
             pass
 
@@ -168,7 +209,7 @@ class Auth:
             raise ValueError(f"User with email {email} not found")
 
         reset_token = str(uuid.uuid4())
-        user.reset_token = reset_token
+        self._db.update_user(user.id, reset_token=reset_token)
         return reset_token
 
     def update_password(self, reset_token: str, password: str) -> None:
@@ -188,8 +229,8 @@ class Auth:
         try:
             user = self._db.find_user_by(reset_token=reset_token)
             hashed_password = self._hash_password(password)
-            user.hashed_password = hashed_password
-            user.reset_token = None
+            self._db.update_user(user.id, hashed_password=hashed_password,
+                                 reset_token=None)
         except NoResultFound:
             raise ValueError("Invalid reset token")
 
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Benchmark: users inserted per second by DB.add_users_bulk at batch sizes
+of 1, 100 and 10000, and read per second by DB.export_users
+"""
+import os
+import sys
+import tempfile
+import time
+
+from db import DB
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    directory = tempfile.mkdtemp()
+
+    for batch_size in (1, 100, 10000):
+        url = "sqlite:///" + os.path.join(
+            directory, "bench_{}.db".format(batch_size))
+        db = DB(url)
+        users = (("user{}@bench.io".format(i), "hashed{}".format(i))
+                 for i in range(count))
+        start = time.perf_counter()
+        added = db.add_users_bulk(users, batch_size)
+        elapsed = time.perf_counter() - start
+        assert added == count
+        print("batch {}: {:.0f} rows/sec".format(batch_size, count / elapsed))
+
+    start = time.perf_counter()
+    exported = sum(1 for _ in db.export_users())
+    elapsed = time.perf_counter() - start
+    print("export: {:.0f} rows/sec".format(exported / elapsed))
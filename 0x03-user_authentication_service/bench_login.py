@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: logins per second with 1, 2, 4 and 8 worker threads sharing
+one Auth, each login running in its own scoped session
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_login.db")
+os.environ.setdefault("DB_URL", "sqlite:///" + DB_PATH)
+
+from auth import Auth  # noqa: E402
+
+
+def login(auth: Auth, email: str, password: str) -> bool:
+    """Log a user in like POST /sessions, then end the request
+    """
+    try:
+        return auth.valid_login(email, password) and \
+            auth.create_session(email) is not None
+    finally:
+        auth.close_session()
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    password = "MyPwd"
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds))
+
+    auth = Auth()
+    emails = ["user{}@bench.io".format(i) for i in range(users)]
+    for email in emails:
+        auth._db.add_user(email, hashed)
+    auth.close_session()
+
+    for workers in (1, 2, 4, 8):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                lambda email: login(auth, email, password), emails))
+        elapsed = time.perf_counter() - start
+        assert all(results)
+        print("{} threads: {:.0f} logins/sec".format(
+            workers, users / elapsed))
@@ -1,35 +1,104 @@
 #!/usr/bin/env python3
 """DB module
 """
-from sqlalchemy import create_engine
+import os
+import re
+from itertools import islice
+from typing import Iterable, Iterator, Tuple
+from sqlalchemy import create_engine, event, insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, exc
+from sqlalchemy.orm import sessionmaker, scoped_session, exc
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.orm.session import Session
-from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import InvalidRequestError, IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 from user import Base, User  # Import the User model from user.py
+from migrations import migrate
+
+
+DB_URL = os.environ.get("DB_URL", "sqlite:///a.db")
+# Connections kept open by the pool, and extra ones opened under load
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+# Rows inserted per transaction, and read per fetch, by the bulk methods
+DB_BULK_BATCH_SIZE = int(os.environ.get("DB_BULK_BATCH_SIZE", 10000))
+# Attributes accepted by DB.update_user
+USER_COLUMNS = frozenset(User.__table__.columns.keys())
+# Drop every table at startup instead of keeping the existing data
+DB_RESET = os.environ.get("DB_RESET", "").lower() in ("1", "true", "yes")
+# Pragmas set on each SQLite connection; an empty value skips a pragma
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("DB_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": os.environ.get("DB_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "cache_size": os.environ.get("DB_CACHE_SIZE", "-64000"),
+}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Set SQLITE_PRAGMAS on a new SQLite connection
+    """
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        if not value:
+            continue
+        if not re.fullmatch(r"-?\w+", value):
+            raise ValueError("Invalid value for {}: {}".format(name, value))
+        cursor.execute("PRAGMA {} = {}".format(name, value))
+    cursor.close()
 
 
 class DB:
     """DB class
+
+    The engine keeps a pool of connections, and each thread gets its own
+    session from a scoped session registry. The owner of a thread, such
+    as the Flask app at the end of a request, calls close_session() to
+    give the connection back to the pool.
+
+    Existing data is kept: the schema is created if missing, and the
+    migrations it lacks are applied.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, url: str = None, pool_size: int = None,
+                 reset: bool = None) -> None:
         """Initialize a new DB instance
+
+        Args:
+            url (str): The database URL, DB_URL by default.
+            pool_size (int): The connection pool size, DB_POOL_SIZE by
+            default.
+            reset (bool): Drop every table first, DB_RESET by default.
         """
-        self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
-        Base.metadata.create_all(self._engine)
-        self.__session = None
+        url = url or DB_URL
+        engine_args = {
+            "poolclass": QueuePool,
+            "pool_size": pool_size or DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+        }
+        if url.startswith("sqlite"):
+            engine_args["connect_args"] = {"check_same_thread": False}
+        self._engine = create_engine(url, echo=False, **engine_args)
+        if url.startswith("sqlite"):
+            event.listen(self._engine, "connect", _set_sqlite_pragmas)
+        with self._engine.begin() as conn:
+            migrate(conn, DB_RESET if reset is None else reset)
+        self.__sessions = scoped_session(
+            sessionmaker(bind=self._engine, expire_on_commit=False))
 
     @property
     def _session(self) -> Session:
-        """Memoized session object
+        """Session of the current thread
+        """
+        return self.__sessions()
+
+    def close_session(self) -> None:
+        """Close the session of the current thread and give its
+        connection back to the pool
         """
-        if self.__session is None:
-            DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+        self.__sessions.remove()
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """
@@ -41,12 +110,81 @@ class DB:
 
         Returns:
             User: The created User object.
+
+        Raises:
+            IntegrityError: If a user with the same email already exists.
         """
         new_user = User(email=email, hashed_password=hashed_password)
         self._session.add(new_user)
-        self._session.commit()
+        try:
+            self._session.commit()
+        except IntegrityError:
+            self._session.rollback()
+            raise
         return new_user
 
+    def add_users_bulk(self, users: Iterable[Tuple[str, str]],
+                       batch_size: int = None) -> int:
+        """
+        Add many users, batch_size rows per transaction.
+
+        Each batch is one multi-row INSERT executed with executemany.
+        On SQLite, users whose email already exists are skipped.
+
+        Args:
+            users (iterable): (email, hashed_password) pairs.
+            batch_size (int): Rows per transaction, DB_BULK_BATCH_SIZE by
+            default.
+
+        Returns:
+            int: The number of users added.
+
+        Raises:
+            IntegrityError: If an email already exists, on other
+            databases than SQLite; the batches before are kept.
+        """
+        batch_size = batch_size or DB_BULK_BATCH_SIZE
+        statement = insert(User.__table__)
+        if self._engine.dialect.name == "sqlite":
+            statement = statement.prefix_with("OR IGNORE")
+        users = iter(users)
+        added = 0
+        while True:
+            batch = [{"email": email, "hashed_password": hashed_password}
+                     for email, hashed_password in islice(users, batch_size)]
+            if not batch:
+                return added
+            with self._engine.begin() as conn:
+                added += conn.execute(statement, batch).rowcount
+
+    def export_users(self, batch_size: int = None) -> Iterator[
+            Tuple[str, str]]:
+        """
+        Stream the users, in the format taken by add_users_bulk.
+
+        Rows are fetched batch_size at a time, so memory does not grow
+        with the number of users.
+
+        Args:
+            batch_size (int): Rows per fetch, DB_BULK_BATCH_SIZE by
+            default.
+
+        Yields:
+            tuple: (email, hashed_password) of each user, by ID.
+        """
+        batch_size = batch_size or DB_BULK_BATCH_SIZE
+        table = User.__table__
+        statement = table.select().order_by(table.c.id)
+        with self._engine.connect() as conn:
+            result = conn.execution_options(stream_results=True) \
+                .execute(statement)
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield row.email, row.hashed_password
+
     def find_user_by(self, **kwargs) -> User:
         """
         Find a user by specified filters.
@@ -73,6 +211,11 @@ class DB:
         """
         Update a user's attributes.
 
+        The attributes are checked against the columns of the users
+        table and written by a single UPDATE ... WHERE id = ? statement,
+        without loading the user. The user, if loaded in the current
+        session, gets the new values too.
+
         Args:
             user_id (int): The ID of the user to update.
             **kwargs: Arbitrary keyword arguments representing user attributes.
@@ -84,20 +227,26 @@ class DB:
             NoResultFound: If the user is not found.
             ValueError: If an invalid attribute is passed.
         """
-        try:
-            user = self.find_user_by(id=user_id)
-            for attr, value in kwargs.items():
-                if hasattr(user, attr):
-                    setattr(user, attr, value)
-                else:
-                    raise ValueError(f"Invalid attribute: {attr}")
-            self._session.commit()
-        except NoResultFound:
+        for attr in kwargs:
+            if attr not in USER_COLUMNS:
+                raise ValueError(f"Invalid attribute: {attr}")
+        if not kwargs:
+            self.find_user_by(id=user_id)
+            return
+
+        updated = self._session.query(User).filter(User.id == user_id) \
+            .update(kwargs, synchronize_session=False)
+        self._session.commit()
+        if updated == 0:
             raise NoResultFound("User not found")
+        user = self._session.identity_map.get(identity_key(User, user_id))
+        if user is not None:
+            for attr, value in kwargs.items():
+                set_committed_value(user, attr, value)
 
 
 if __name__ == "__main__":
-    my_db = DB()
+    my_db = DB(reset=True)
 
     user_1 = my_db.add_user("test@test.com", "PwdHashed")
     print(user_1.id)
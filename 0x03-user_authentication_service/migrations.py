@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Migrations module
+
+The schema version of a database is kept in its schema_version table.
+MIGRATIONS[n - 1] brings a database from version n to version n + 1;
+databases created before the table existed are at version 1.
+"""
+from typing import Callable, List
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.engine import Connection
+from user import Base, User
+
+
+version_metadata = MetaData()
+schema_version = Table(
+    "schema_version", version_metadata,
+    Column("version", Integer, nullable=False)
+)
+
+
+def _add_user_indexes(conn: Connection) -> None:
+    """Version 2: unique email, indexed session_id and reset_token
+    """
+    for index in User.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+MIGRATIONS: List[Callable[[Connection], None]] = [
+    _add_user_indexes,
+]
+SCHEMA_VERSION = len(MIGRATIONS) + 1
+
+
+def get_version(conn: Connection) -> int:
+    """Get the schema version of a database
+
+    Returns:
+        int: The version, or 0 if the database has no users table.
+    """
+    if not conn.dialect.has_table(conn, User.__tablename__):
+        return 0
+    if not conn.dialect.has_table(conn, schema_version.name):
+        return 1
+    version = conn.execute(schema_version.select()).scalar()
+    return 1 if version is None else version
+
+
+def set_version(conn: Connection, version: int) -> None:
+    """Record the schema version of a database
+    """
+    version_metadata.create_all(conn)
+    conn.execute(schema_version.delete())
+    conn.execute(schema_version.insert().values(version=version))
+
+
+def migrate(conn: Connection, reset: bool = False) -> int:
+    """Bring a database to SCHEMA_VERSION
+
+    A database without tables gets the current schema at once; an older
+    one runs the migrations it is missing, in order. Nothing is written
+    when the database is up to date.
+
+    Args:
+        conn (Connection): A connection inside a transaction.
+        reset (bool): Drop every table first.
+
+    Returns:
+        int: The number of migrations applied.
+    """
+    if reset:
+        Base.metadata.drop_all(conn)
+        version_metadata.drop_all(conn)
+
+    version = get_version(conn)
+    if version == SCHEMA_VERSION:
+        return 0
+    if version > SCHEMA_VERSION:
+        raise RuntimeError("Database schema version {} is newer than {}"
+                           .format(version, SCHEMA_VERSION))
+    if version == 0:
+        Base.metadata.create_all(conn)
+        set_version(conn, SCHEMA_VERSION)
+        return 0
+
+    for migration in MIGRATIONS[version - 1:]:
+        migration(conn)
+    set_version(conn, SCHEMA_VERSION)
+    return SCHEMA_VERSION - version
@@ -12,14 +12,17 @@ Base = declarative_base()
 class User(Base):
     """
     User class for the 'users' table.
+
+    email is unique, and session_id and reset_token are indexed, as users
+    are looked up by each of them.
     """
     __tablename__ = 'users'
 
     id = Column(Integer, primary_key=True)
-    email = Column(String(250), nullable=False)
+    email = Column(String(250), nullable=False, unique=True, index=True)
     hashed_password = Column(String(250), nullable=False)
-    session_id = Column(String(250), nullable=True)
-    reset_token = Column(String(250), nullable=True)
+    session_id = Column(String(250), nullable=True, index=True)
+    reset_token = Column(String(250), nullable=True, index=True)
 
 
 if __name__ == "__main__":